@@ -2,8 +2,9 @@
 Configuration settings for the ETL backend
 """
 import os
+from functools import lru_cache
 from pathlib import Path
-from pydantic import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -31,13 +32,12 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", frozen=True)
 
 
-# Global settings instance
-settings = Settings()
-
-# Ensure upload directory exists
-Path(settings.upload_dir).mkdir(exist_ok=True)
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings on first use and ensure the upload directory exists"""
+    settings = Settings()
+    Path(settings.upload_dir).mkdir(exist_ok=True)
+    return settings
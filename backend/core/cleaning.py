@@ -3,11 +3,49 @@ Enhanced data cleaning functionality with better error handling
 """
 import pandas as pd
 import re
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List, Sequence
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns used by the cleaners
+_QUOTEPLUS_RE = re.compile(r"['\"+ ]+")
+
+# Every byte except ASCII A-Z and 0-9, deleted from YAZAKI PNs
+_PN_DELETE_BYTES = bytes(b for b in range(256) if not (ord("A") <= b <= ord("Z") or ord("0") <= b <= ord("9")))
+
+# Same as above but keeps the newline used to join a whole column
+_PN_DELETE_BYTES_JOINED = _PN_DELETE_BYTES.replace(b"\n", b"")
+
+
+def _sanitize_pn(value: str) -> str:
+    """Uppercase a part number and keep only ASCII A-Z/0-9 (same as re.sub(r"[^A-Z0-9]", ""))"""
+    return value.upper().encode("ascii", "ignore").translate(None, _PN_DELETE_BYTES).decode("ascii")
+
+
+def _sanitize_pn_column(values: Sequence[str]) -> List[str]:
+    """
+    Sanitize a whole column of part numbers at once: the values are joined on
+    newlines so upper/encode/translate each run once over the column in C
+    """
+    if len(values) == 0:
+        return []
+
+    joined = "\n".join(values)
+    if joined.count("\n") != len(values) - 1:
+        # Some value contains a newline itself, sanitize one by one
+        return [_sanitize_pn(v) for v in values]
+
+    cleaned = joined.upper().encode("ascii", "ignore").translate(None, _PN_DELETE_BYTES_JOINED)
+    return cleaned.decode("ascii").split("\n")
+
+
+def stripped_str(values: pd.Series) -> pd.Series:
+    """values.astype(str).str.strip(), running the strip kernel directly on Arrow-backed strings"""
+    if values.dtype != object and pd.api.types.is_string_dtype(values.dtype):
+        return values.str.strip()
+    return values.astype(str).str.strip()
+
 
 class DataCleaner:
     """Handles data cleaning operations"""
@@ -35,17 +73,19 @@ class DataCleaner:
         
         # Clean ONLY YAZAKI PN column
         if 'YAZAKI PN' in df.columns:
-            # Count nulls before cleaning
-            stats["rows_with_null_yazaki_pn"] = df['YAZAKI PN'].isna().sum()
-            
-            # Force conversion to string, handling all data types
+            s = df['YAZAKI PN']
+            is_na = s.isna()
+
+            # Count nulls before cleaning (reusing the NA mask)
+            stats["rows_with_null_yazaki_pn"] = is_na.sum()
+
+            # Force conversion to string, handling all data types (vectorized)
             original_count = len(df)
-            df['YAZAKI PN'] = df['YAZAKI PN'].apply(
-                lambda x: str(x) if pd.notna(x) else ''
-            ).str.upper().str.replace(r"[^A-Z0-9]", "", regex=True)
-            
+            s = s.mask(is_na, '').astype(str)
+            df['YAZAKI PN'] = _sanitize_pn_column(s.to_numpy())
+
             # Remove rows with empty YAZAKI PN after cleaning
-            df = df[df['YAZAKI PN'].str.len() > 0]
+            df = df.loc[df['YAZAKI PN'].str.len() > 0]
             stats["rows_cleaned"] = original_count - len(df)
         
         stats["final_shape"] = df.shape
@@ -85,13 +125,15 @@ class DataCleaner:
             stats["columns_swapped"] = True
         
         # Clean string values and ensure consistent types
-        string_columns = df.select_dtypes(include=['object']).columns
+        string_columns = df.select_dtypes(include=['object', 'string']).columns
         for col in string_columns:
-            df[col] = df[col].apply(
-                lambda x: str(x) if pd.notna(x) else ''
-            ).apply(
-                lambda x: re.sub(r"['\"+ ]+", "", x).strip()
-            )
+            # Single pass: stringify, regex and strip per value (NA mask computed in C)
+            values = df[col].to_numpy()
+            is_na = df[col].isna().to_numpy()
+            df[col] = [
+                "" if na else _QUOTEPLUS_RE.sub("", str(v)).strip()
+                for v, na in zip(values, is_na)
+            ]
             stats["string_columns_cleaned"] += 1
         
         stats["final_shape"] = df.shape
@@ -125,27 +167,39 @@ class DataCleaner:
         """
         Fix DataFrame data types to prevent PyArrow serialization errors in Streamlit
         """
-        df = df.copy()
+        obj_cols = df.select_dtypes(include='object').columns
+        # Arrow-backed string columns (as loaded from uploads) get the same treatment
+        str_cols = [
+            col for col, dtype in df.dtypes.items()
+            if dtype != object and pd.api.types.is_string_dtype(dtype)
+        ]
+        num_cols = df.select_dtypes(include=['int64', 'float64']).columns
+        num_cols = num_cols[df[num_cols].isna().any().to_numpy()]
+
+        # Fast path: nothing to convert or fill, hand the frame back as-is
+        if len(obj_cols) == 0 and len(str_cols) == 0 and len(num_cols) == 0:
+            return df
+
+        # Shallow copy: columns are replaced below, the caller's frame is untouched
+        df = df.copy(deep=False)
+
+        # Convert all object columns to string to avoid mixed type issues,
+        # replacing 'nan' strings with empty strings for cleaner display.
+        # Stored as Arrow-backed strings so .str operations use Arrow kernels
+        if len(obj_cols):
+            df[obj_cols] = (
+                df[obj_cols].astype(str)
+                .replace({'nan': '', 'None': '', 'NaN': ''})
+                .astype('string[pyarrow]')
+            )
+
+        # Their missing values become empty strings, like the 'nan' strings above
+        for col in str_cols:
+            df[col] = df[col].fillna('').replace({'nan': '', 'None': '', 'NaN': ''}).astype('string[pyarrow]')
 
-        for col in df.columns:
-            # Convert all object columns to string to avoid mixed type issues
-            if df[col].dtype == 'object':
-                # Handle mixed types by converting everything to string
-                df[col] = df[col].astype(str)
-                # Replace 'nan' strings with empty strings for cleaner display
-                df[col] = df[col].replace(['nan', 'None', 'NaN'], '')
-
-            # Handle numeric columns that might have mixed types
-            elif df[col].dtype in ['int64', 'float64']:
-                # Ensure numeric columns are properly typed
-                try:
-                    # Try to convert to numeric, coercing errors to NaN
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                    # Fill NaN with 0 for display purposes
-                    df[col] = df[col].fillna(0)
-                except:
-                    # If conversion fails, convert to string
-                    df[col] = df[col].astype(str)
+        # Fill missing numeric values with 0 for display purposes (only columns that have any)
+        if len(num_cols):
+            df[num_cols] = df[num_cols].fillna(0)
 
         logger.info("DataFrame types fixed for Arrow compatibility")
         return df
@@ -1,17 +1,158 @@
 """
 Enhanced file handling with better error handling and validation
 """
+import numpy as np
 import pandas as pd
-import io
+import pyarrow as pa
+import pyarrow.feather as feather
+import itertools
 import logging
-from typing import Dict, List, Union
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 import uuid
 import os
+import shutil
 from pathlib import Path
 
+from .cleaning import stripped_str
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Chunk size used when copying uploads to disk
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Lower-cased column names that are normalized to 'YAZAKI PN'
+YAZAKI_PN_ALIASES = {'yazaki pn', 'yazaki_pn', 'yazakipn'}
+
+# Upper bound on threads parsing the sheets of one workbook
+EXCEL_PARSE_WORKERS = 8
+
+# Serialized previews kept by the preview cache
+PREVIEW_CACHE_SIZE = 256
+
+# Monotonic counter for processed sheet versions (never reused across files)
+_sheet_versions = itertools.count(1)
+
+
+def _numpy_non_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep Arrow-backed string columns but give every other Arrow column the numpy dtype the
+    default backend loads (ints/bools with blanks as float64 NaN, timestamps as datetime64[ns]),
+    so cleaning fills and lookup statuses are the same as with numpy-backed sheets
+    """
+    df = df.copy(deep=False)
+    for position, dtype in enumerate(df.dtypes):
+        if not isinstance(dtype, pd.ArrowDtype):
+            continue
+        pa_type = dtype.pyarrow_dtype
+        if pa.types.is_string(pa_type) or pa.types.is_large_string(pa_type):
+            continue
+
+        column = df.iloc[:, position]
+        has_na = bool(column.isna().any())
+        if pa.types.is_integer(pa_type) or pa.types.is_boolean(pa_type):
+            if has_na:
+                values = column.to_numpy(dtype="float64", na_value=np.nan)
+            else:
+                values = column.to_numpy(dtype="int64" if pa.types.is_integer(pa_type) else "bool")
+        elif pa.types.is_floating(pa_type):
+            values = column.to_numpy(dtype="float64", na_value=np.nan)
+        elif pa.types.is_timestamp(pa_type):
+            values = column.astype("datetime64[ns]")
+        else:
+            values = column.to_numpy(dtype=object, na_value=None)
+        df.isetitem(position, values)
+    return df
+
+
+@lru_cache(maxsize=1)
+def _excel_engine() -> Optional[str]:
+    """'calamine' when python-calamine is installed, otherwise None (pandas' default engine)"""
+    try:
+        import python_calamine  # noqa: F401
+        return "calamine"
+    except ImportError:
+        logger.info("python-calamine not installed, reading Excel files with the default engine")
+        return None
+
+
+class SheetCache(Mapping):
+    """
+    Read-only mapping of sheet name -> DataFrame backed by Arrow files on disk.
+    Sheets are memory-mapped on access, so only the OS page cache holds them.
+    Frames Arrow cannot store (mixed-type columns, non-string headers) stay in memory.
+    """
+
+    def __init__(self, cache_dir: Path, file_id: str, sheets: Dict[str, pd.DataFrame]):
+        self._paths: Dict[str, Path] = {}
+        self._in_memory: Dict[str, pd.DataFrame] = {}
+        self._order: List[str] = list(sheets)
+
+        for index, (sheet_name, df) in enumerate(sheets.items()):
+            path = cache_dir / f"{file_id}_{index}.arrow"
+            try:
+                if not all(isinstance(col, str) for col in df.columns):
+                    raise TypeError("Arrow files need string column names")
+                feather.write_feather(df, path, compression="uncompressed")
+                self._paths[sheet_name] = path
+            except Exception as e:
+                logger.debug(f"Keeping sheet '{sheet_name}' in memory, Arrow spill failed: {e}")
+                if path.exists():
+                    path.unlink()
+                self._in_memory[sheet_name] = df
+
+    def __getitem__(self, sheet_name: str) -> pd.DataFrame:
+        """Return the sheet, loading spilled sheets fresh from their Arrow file"""
+        if sheet_name in self._paths:
+            table = feather.read_table(str(self._paths[sheet_name]), memory_map=True)
+            return table.to_pandas()
+        if sheet_name in self._in_memory:
+            return self._in_memory[sheet_name]
+        raise KeyError(sheet_name)
+
+    def read(self, sheet_name: str, nrows: Optional[int] = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Return the sheet, optionally only its first nrows and/or some columns.
+        Spilled sheets are sliced and column-pruned in Arrow before converting to pandas
+        """
+        if sheet_name in self._paths:
+            table = feather.read_table(str(self._paths[sheet_name]), columns=columns, memory_map=True)
+            if nrows is not None:
+                table = table.slice(0, nrows)
+            return table.to_pandas()
+
+        df = self[sheet_name]
+        if columns is not None:
+            df = df[columns]
+        return df.head(nrows) if nrows is not None else df
+
+    def column_names(self, sheet_name: str) -> List[str]:
+        """Column names of a sheet, read from the Arrow schema for spilled sheets"""
+        if sheet_name in self._paths:
+            with pa.memory_map(str(self._paths[sheet_name])) as source:
+                return pa.ipc.open_file(source).schema.names
+        return list(self[sheet_name].columns)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def clear(self):
+        """Delete spilled sheet files from disk"""
+        for path in self._paths.values():
+            if path.exists():
+                path.unlink()
+        self._paths.clear()
+        self._in_memory.clear()
+
 
 class FileManager:
     """Manages uploaded files and their processing"""
@@ -20,26 +161,47 @@ class FileManager:
         self.files_storage = {}  # In-memory storage for demo
         self.upload_dir = Path("uploads")
         self.upload_dir.mkdir(exist_ok=True)
+        self.cache_dir = self.upload_dir / "cache"
+        self.cache_dir.mkdir(exist_ok=True)
+        # Serialized preview pages, least recently used first
+        self._preview_cache: "OrderedDict[tuple, List[Dict]]" = OrderedDict()
+        self._preview_lock = threading.Lock()
     
-    def save_uploaded_file(self, file_content: bytes, filename: str) -> str:
-        """Save uploaded file and return file ID"""
-        # Clear old files from memory for performance optimization
-        self._cleanup_old_files()
+    def save_uploaded_file(self, file_stream: BinaryIO, filename: str) -> str:
+        """Stream uploaded file to disk and return file ID"""
+        file_id = str(uuid.uuid4())
+
+        # Save file to disk for persistence, copying in 1 MB chunks
+        file_path = self.upload_dir / f"{file_id}_{filename}"
+        with open(file_path, "wb", buffering=COPY_BUFFER_SIZE) as f:
+            shutil.copyfileobj(file_stream, f, length=COPY_BUFFER_SIZE)
+
+        return self._register_file(file_id, file_path, filename)
 
+    def save_uploaded_path(self, path: Union[str, Path], filename: str) -> str:
+        """Move a file already on disk into storage (no re-read or copy) and return file ID"""
         file_id = str(uuid.uuid4())
 
-        # Save file to disk for persistence
         file_path = self.upload_dir / f"{file_id}_{filename}"
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        shutil.move(str(path), file_path)
+
+        return self._register_file(file_id, file_path, filename)
+
+    def _register_file(self, file_id: str, file_path: Path, filename: str) -> str:
+        """Load a stored file's sheets into the cache under file_id"""
+        # Clear old files from memory for performance optimization
+        self._cleanup_old_files()
 
         # Load and store sheets in memory for quick access
         try:
-            sheets = self._load_file_from_bytes(file_content, filename)
+            sheets = self._load_file(file_path, filename)
 
             # Auto-fix column names (especially Yazaki PN → YAZAKI PN)
             sheets = self._auto_fix_column_names(sheets)
 
+            # Spill sheets to memory-mapped Arrow files instead of holding them in RAM
+            sheets = SheetCache(self.cache_dir, file_id, sheets)
+
             self.files_storage[file_id] = {
                 "filename": filename,
                 "file_path": str(file_path),
@@ -56,56 +218,54 @@ class FileManager:
                 file_path.unlink()
             raise e
     
-    def _load_file_from_bytes(self, file_content: bytes, filename: str) -> Dict[str, pd.DataFrame]:
-        """Load file from bytes and return sheets dictionary"""
+    def _load_file(self, file_path: Path, filename: str) -> Dict[str, pd.DataFrame]:
+        """Load file from disk and return sheets dictionary"""
+        sheets = self._read_file(file_path, filename)
+        # Only strings stay Arrow-backed; other columns get the dtypes the numpy backend gives
+        return {sheet_name: _numpy_non_strings(df) for sheet_name, df in sheets.items()}
+
+    def _read_file(self, file_path: Path, filename: str) -> Dict[str, pd.DataFrame]:
+        """Parse the file with Arrow-backed dtypes"""
+        # Arrow-backed dtypes: strings live in contiguous buffers and use Arrow string kernels
         if filename.lower().endswith(".csv"):
-            df = pd.read_csv(io.BytesIO(file_content))
+            df = pd.read_csv(file_path, engine="pyarrow", dtype_backend="pyarrow")
             return {"Sheet1": df}
         
-        # For Excel files
-        xl = pd.ExcelFile(io.BytesIO(file_content))
-        return {name: xl.parse(name) for name in xl.sheet_names}
+        engine = _excel_engine()
+        if engine == "calamine":
+            # calamine parses natively, so sheets of one workbook are read in parallel
+            sheet_names = pd.ExcelFile(file_path, engine=engine).sheet_names
+            if len(sheet_names) > 1:
+                def read_sheet(sheet_name: str) -> pd.DataFrame:
+                    return pd.read_excel(file_path, sheet_name=sheet_name, engine=engine, dtype_backend="pyarrow")
+
+                with ThreadPoolExecutor(max_workers=min(len(sheet_names), EXCEL_PARSE_WORKERS)) as executor:
+                    return dict(zip(sheet_names, executor.map(read_sheet, sheet_names)))
+
+        # For Excel files, load all sheets in a single pass over the workbook
+        return pd.read_excel(file_path, sheet_name=None, engine=engine, dtype_backend="pyarrow")
 
     def _auto_fix_column_names(self, sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
         """Auto-fix common column name issues"""
         fixed_sheets = {}
 
         for sheet_name, df in sheets.items():
-            df_copy = df.copy()
-
-            # Fix column names
-            new_columns = []
-            changes_made = []
-
-            for i, col in enumerate(df_copy.columns):
-                original_col = col
-
-                # Fix Yazaki PN → YAZAKI PN (case insensitive)
-                if str(col).lower().strip() in ['yazaki pn', 'yazaki_pn', 'yazakipn']:
-                    new_col = 'YAZAKI PN'
-                    new_columns.append(new_col)
-                    if original_col != new_col:
-                        changes_made.append(f"'{original_col}' → '{new_col}'")
-
-                # Fix other common variations
-                elif str(col).lower().strip() in ['yazaki PN', 'YAZAKI_PN', 'YAZAKIPN']:
-                    new_col = 'YAZAKI PN'
-                    new_columns.append(new_col)
-                    if original_col != new_col:
-                        changes_made.append(f"'{original_col}' → '{new_col}'")
-
-                # Keep original column name if no fix needed
-                else:
-                    new_columns.append(col)
-
-            # Apply column name changes
-            df_copy.columns = new_columns
-
-            # Log changes
+            # Fix Yazaki PN → YAZAKI PN (case insensitive)
+            new_columns = [
+                'YAZAKI PN' if str(col).strip().lower() in YAZAKI_PN_ALIASES else col
+                for col in df.columns
+            ]
+            changes_made = [
+                f"'{old}' → '{new}'" for old, new in zip(df.columns, new_columns) if old != new
+            ]
+
+            # Renaming only touches column metadata, no data is copied
             if changes_made:
+                df = df.copy(deep=False)
+                df.columns = new_columns
                 logger.info(f"Auto-fixed column names in sheet '{sheet_name}': {', '.join(changes_made)}")
 
-            fixed_sheets[sheet_name] = df_copy
+            fixed_sheets[sheet_name] = df
 
         return fixed_sheets
     
@@ -115,42 +275,190 @@ class FileManager:
             raise ValueError(f"File ID {file_id} not found")
         return list(self.files_storage[file_id]["sheets"].keys())
     
-    def get_sheet(self, file_id: str, sheet_name: str) -> pd.DataFrame:
-        """Get a specific sheet"""
+    def get_sheet(self, file_id: str, sheet_name: str, *, copy: bool = False,
+                  nrows: Optional[int] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Get a specific sheet
+        The stored frame is returned as-is; pass copy=True before mutating it in place.
+        With nrows/columns only those rows/columns are materialized
+        """
+        sheets = self._get_sheets(file_id, sheet_name)
+        if isinstance(sheets, SheetCache):
+            df = sheets.read(sheet_name, nrows=nrows, columns=columns)
+        else:
+            df = sheets[sheet_name]
+            if columns is not None:
+                df = df[columns]
+            if nrows is not None:
+                df = df.head(nrows)
+        return df.copy() if copy else df
+
+    def get_sheet_columns(self, file_id: str, sheet_name: str) -> List[str]:
+        """Column names of a sheet without loading its data"""
+        sheets = self._get_sheets(file_id, sheet_name)
+        if isinstance(sheets, SheetCache):
+            return sheets.column_names(sheet_name)
+        return list(sheets[sheet_name].columns)
+
+    def _get_sheets(self, file_id: str, sheet_name: str):
+        """Sheets mapping of a file, checking that file and sheet exist"""
         if file_id not in self.files_storage:
             raise ValueError(f"File ID {file_id} not found")
         
         sheets = self.files_storage[file_id]["sheets"]
         if sheet_name not in sheets:
             raise ValueError(f"Sheet {sheet_name} not found")
-        
-        return sheets[sheet_name].copy()
+        return sheets
     
-    def update_sheet(self, file_id: str, sheet_name: str, dataframe: pd.DataFrame):
-        """Update a sheet with processed data"""
+    def get_pn_codes(self, file_id: str, sheet_name: str) -> np.ndarray:
+        """
+        Integer codes of a sheet's stripped 'YAZAKI PN' values, computed once per sheet.
+        Codes index the file-wide pn_uniques, so codes of different sheets compare directly
+        """
+        if file_id not in self.files_storage:
+            raise ValueError(f"File ID {file_id} not found")
+
+        file_info = self.files_storage[file_id]
+        pn_codes = file_info.setdefault("pn_codes", {})
+        if sheet_name in pn_codes:
+            return pn_codes[sheet_name]
+
+        # Missing PNs get a code of their own, so they match each other like before
+        pns = stripped_str(self.get_sheet(file_id, sheet_name, columns=['YAZAKI PN'])['YAZAKI PN'])
+        uniques = file_info.get("pn_uniques")
+        if uniques is None:
+            codes, uniques = pd.factorize(pns, use_na_sentinel=False)
+        else:
+            # Extend the shared uniques with PNs this sheet introduces
+            codes = uniques.get_indexer(pns)
+            missing = codes == -1
+            if missing.any():
+                new_codes, new_uniques = pd.factorize(pns[missing], use_na_sentinel=False)
+                codes[missing] = new_codes + len(uniques)
+                uniques = uniques.append(new_uniques)
+
+        file_info["pn_uniques"] = pd.Index(uniques)
+        pn_codes[sheet_name] = codes
+        return codes
+
+    def pn_isin(self, file_id: str, sheet_name: str, other_sheet: str) -> np.ndarray:
+        """
+        Boolean mask of sheet_name rows whose stripped 'YAZAKI PN' appears in other_sheet.
+        other_sheet's PNs are kept as a presence table over pn_uniques, so each call is one array lookup
+        """
+        codes = self.get_pn_codes(file_id, sheet_name)
+        other_codes = self.get_pn_codes(file_id, other_sheet)
+
+        file_info = self.files_storage[file_id]
+        n_uniques = len(file_info["pn_uniques"])
+        presence = file_info.setdefault("pn_presence", {})
+        present = presence.get(other_sheet)
+        # Rebuilt when later sheets added PNs to pn_uniques
+        if present is None or len(present) != n_uniques:
+            present = np.zeros(n_uniques, dtype=bool)
+            present[other_codes] = True
+            presence[other_sheet] = present
+
+        return present[codes]
+
+    def update_sheet(self, file_id: str, sheet_name: str, dataframe: pd.DataFrame, *, copy: bool = True):
+        """
+        Update a sheet with processed data
+        Pass the fully built frame once; never call this per row to grow a sheet incrementally.
+        copy=False stores the frame as-is, for frames nobody mutates in place afterwards
+        """
         if file_id not in self.files_storage:
             raise ValueError(f"File ID {file_id} not found")
         
-        self.files_storage[file_id]["processed_sheets"][sheet_name] = dataframe.copy()
+        file_info = self.files_storage[file_id]
+        file_info["processed_sheets"][sheet_name] = dataframe.copy() if copy else dataframe
+        # New version: cached previews of the previous data are no longer hit
+        file_info.setdefault("sheet_versions", {})[sheet_name] = next(_sheet_versions)
+
+    def update_column(self, file_id: str, sheet_name: str, column_name: str, values):
+        """
+        Replace one column of the processed sheet (or of the original when none is stored yet).
+        The new frame is a shallow copy sharing every other column with the previous one,
+        so nothing is deep-copied; neither frame is modified in place
+        """
+        dataframe = self.get_processed_sheet(file_id, sheet_name).copy(deep=False)
+        dataframe[column_name] = values
+        self.update_sheet(file_id, sheet_name, dataframe, copy=False)
     
-    def get_processed_sheet(self, file_id: str, sheet_name: str) -> pd.DataFrame:
-        """Get processed sheet if available, otherwise return original"""
+    def get_processed_sheet(self, file_id: str, sheet_name: str, *, copy: bool = False) -> pd.DataFrame:
+        """
+        Get processed sheet if available, otherwise return original
+        The stored frame is returned as-is; pass copy=True before mutating it in place
+        """
         if file_id not in self.files_storage:
             raise ValueError(f"File ID {file_id} not found")
         
         processed = self.files_storage[file_id]["processed_sheets"]
         if sheet_name in processed:
-            return processed[sheet_name].copy()
+            df = processed[sheet_name]
+            return df.copy() if copy else df
         
-        return self.get_sheet(file_id, sheet_name)
+        return self.get_sheet(file_id, sheet_name, copy=copy)
     
-    def preview_sheets(self, file_id: str, sheet_names: List[str], rows: int = 5) -> Dict[str, List[Dict]]:
+    def sheet_version(self, file_id: str, sheet_name: str) -> int:
+        """Version of a sheet's processed data (0 until update_sheet stores one)"""
+        if file_id not in self.files_storage:
+            raise ValueError(f"File ID {file_id} not found")
+        return self.files_storage[file_id].get("sheet_versions", {}).get(sheet_name, 0)
+
+    def check_sheet_version(self, file_id: str, sheet_name: str, version: Optional[int]):
+        """Raise if a client's version token no longer matches the stored sheet"""
+        if version is not None and version != self.sheet_version(file_id, sheet_name):
+            raise ValueError(f"Version {version} of sheet {sheet_name} is no longer available")
+
+    def preview_sheets(self, file_id: str, sheet_names: List[str], rows: int = 5, *,
+                       offset: int = 0, processed: bool = False) -> Dict[str, List[Dict]]:
         """Get preview of multiple sheets"""
-        previews = {}
-        for sheet_name in sheet_names:
-            df = self.get_sheet(file_id, sheet_name)
-            previews[sheet_name] = df.head(rows).to_dict('records')
-        return previews
+        return {
+            sheet_name: self.preview_records(file_id, sheet_name, rows, offset=offset, processed=processed)
+            for sheet_name in sheet_names
+        }
+
+    def preview_records(self, file_id: str, sheet_name: str, rows: int, *, offset: int = 0,
+                        processed: bool = False, columns: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        """
+        A page of rows (offset, offset + rows) of a sheet as records, served from an LRU cache
+        keyed by the sheet version. With processed=True the processed sheet is previewed
+        (falling back to the original). The returned list is shared with the cache and must not be mutated
+        """
+        version = self.sheet_version(file_id, sheet_name) if processed else 0
+        key = (file_id, sheet_name, offset, rows, processed, columns, version)
+        with self._preview_lock:
+            records = self._preview_cache.get(key)
+            if records is not None:
+                self._preview_cache.move_to_end(key)
+                return records
+
+        records = self._preview_records(file_id, sheet_name, offset, rows, processed, columns)
+        with self._preview_lock:
+            self._preview_cache[key] = records
+            if len(self._preview_cache) > PREVIEW_CACHE_SIZE:
+                self._preview_cache.popitem(last=False)
+        return records
+
+    def _preview_records(self, file_id: str, sheet_name: str, offset: int, rows: int, processed: bool,
+                         columns: Optional[Tuple[str, ...]]) -> List[Dict]:
+        """Serialize a preview page"""
+        if processed:
+            df = self.get_processed_sheet(file_id, sheet_name)
+        else:
+            # Only the rows up to the end of the page are loaded, never the whole sheet
+            df = self.get_sheet(file_id, sheet_name, nrows=offset + rows)
+        df = df.iloc[offset:offset + rows]
+        if columns is not None:
+            df = df[list(columns)]
+        return df.to_dict('records')
+
+    def _drop_previews(self, file_id: str):
+        """Evict the cached preview pages of a file"""
+        with self._preview_lock:
+            for key in [key for key in self._preview_cache if key[0] == file_id]:
+                del self._preview_cache[key]
     
     def cleanup_file(self, file_id: str):
         """Remove file from storage and disk"""
@@ -158,7 +466,9 @@ class FileManager:
             file_path = Path(self.files_storage[file_id]["file_path"])
             if file_path.exists():
                 file_path.unlink()
+            self._release_sheets(self.files_storage[file_id])
             del self.files_storage[file_id]
+        self._drop_previews(file_id)
 
     def _cleanup_old_files(self, max_files: int = 5, max_age_hours: int = 24):
         """Clean up old files from memory to optimize performance"""
@@ -202,8 +512,10 @@ class FileManager:
         if file_id in self.files_storage:
             file_info = self.files_storage[file_id]
 
-            # Remove from memory
+            # Remove from memory and drop spilled sheets
+            self._release_sheets(file_info)
             del self.files_storage[file_id]
+            self._drop_previews(file_id)
 
             # Optionally remove from disk (uncomment if needed)
             # file_path = Path(file_info["file_path"])
@@ -215,9 +527,20 @@ class FileManager:
     def clear_all_cache(self):
         """Clear all cached files for performance optimization"""
         file_count = len(self.files_storage)
+        for file_info in self.files_storage.values():
+            self._release_sheets(file_info)
         self.files_storage.clear()
+        with self._preview_lock:
+            self._preview_cache.clear()
         logger.info(f"Cleared all {file_count} files from cache for performance optimization")
 
+    @staticmethod
+    def _release_sheets(file_info: Dict):
+        """Delete the on-disk Arrow cache of a file's sheets, if any"""
+        sheets = file_info.get("sheets")
+        if isinstance(sheets, SheetCache):
+            sheets.clear()
+
 
 # Global file manager instance
 file_manager = FileManager()
@@ -3,36 +3,61 @@ Log Manager for ETL Automation Tool
 Handles log collection, formatting, and export functionality
 """
 import logging
-import io
 import json
+from itertools import islice
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
+import numpy as np
 import pandas as pd
 
+# Exports are streamed in chunks of about this many characters
+LOG_EXPORT_CHUNK_CHARS = 64 * 1024
+
+# CSV export rows encoded per chunk
+LOG_EXPORT_CSV_ROWS = 1_000
+
+
 class LogManager:
     """Manages application logs and provides export functionality"""
     
     def __init__(self):
-        self.session_logs = []
-        self.detailed_logs = []
+        # Logs are stored column-wise (one list per field); timestamps are
+        # datetime objects appended in order, so each stream is already sorted
+        self._sess_ts = []
+        self._sess_level = []
+        self._sess_msg = []
+        self._det_ts = []
+        self._det_op = []
+        self._det_details = []
+        self._ts_fmt = "%Y-%m-%d %H:%M:%S"
+        
+    @property
+    def session_logs(self) -> List[Dict[str, Any]]:
+        """Session logs as a list of entries"""
+        return [
+            {"timestamp": ts.isoformat(), "level": level, "message": message}
+            for ts, level, message in zip(self._sess_ts, self._sess_level, self._sess_msg)
+        ]
+        
+    @property
+    def detailed_logs(self) -> List[Dict[str, Any]]:
+        """Detailed logs as a list of entries"""
+        return [
+            {"timestamp": ts.isoformat(), "operation": operation, "details": details}
+            for ts, operation, details in zip(self._det_ts, self._det_op, self._det_details)
+        ]
         
     def add_session_log(self, message: str, level: str = "INFO"):
         """Add a session log entry"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "level": level,
-            "message": message
-        }
-        self.session_logs.append(log_entry)
+        self._sess_ts.append(datetime.now())
+        self._sess_level.append(level)
+        self._sess_msg.append(message)
         
     def add_detailed_log(self, operation: str, details: Dict[str, Any]):
         """Add detailed operation log"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "operation": operation,
-            "details": details
-        }
-        self.detailed_logs.append(log_entry)
+        self._det_ts.append(datetime.now())
+        self._det_op.append(operation)
+        self._det_details.append(details)
         
     def get_session_logs(self) -> List[Dict[str, Any]]:
         """Get all session logs"""
@@ -42,101 +67,181 @@ class LogManager:
         """Get all detailed logs"""
         return self.detailed_logs
         
-    def export_logs_as_text(self) -> str:
-        """Export logs as formatted text"""
-        output = []
-        output.append("=" * 80)
-        output.append("ETL AUTOMATION TOOL v2.0 - SESSION LOG EXPORT")
-        output.append("=" * 80)
-        output.append(f"Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        output.append(f"Total Session Logs: {len(self.session_logs)}")
-        output.append(f"Total Detailed Logs: {len(self.detailed_logs)}")
-        output.append("")
+    @staticmethod
+    def _chunks(pieces: Iterable[str]) -> Iterator[str]:
+        """Concatenate text pieces into chunks of about LOG_EXPORT_CHUNK_CHARS characters"""
+        buffer = []
+        size = 0
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
+            if size >= LOG_EXPORT_CHUNK_CHARS:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield "".join(buffer)
+
+    def _text_lines(self) -> Iterator[str]:
+        """Lines of the text export"""
+        # Entries logged while the export is streaming are left out, matching the totals
+        n_session = len(self._sess_ts)
+        n_detailed = len(self._det_ts)
+        yield "=" * 80
+        yield "ETL AUTOMATION TOOL v2.0 - SESSION LOG EXPORT"
+        yield "=" * 80
+        yield f"Export Date: {datetime.now().strftime(self._ts_fmt)}"
+        yield f"Total Session Logs: {n_session}"
+        yield f"Total Detailed Logs: {n_detailed}"
+        yield ""
         
         # Session logs
-        output.append("SESSION LOGS:")
-        output.append("-" * 40)
-        for log in self.session_logs:
-            timestamp = log["timestamp"][:19].replace("T", " ")
-            output.append(f"[{timestamp}] {log['level']}: {log['message']}")
+        yield "SESSION LOGS:"
+        yield "-" * 40
+        ts_fmt = self._ts_fmt
+        for ts, level, message in islice(zip(self._sess_ts, self._sess_level, self._sess_msg), n_session):
+            yield f"[{ts.strftime(ts_fmt)}] {level}: {message}"
         
-        output.append("")
+        yield ""
         
         # Detailed logs
-        output.append("DETAILED OPERATION LOGS:")
-        output.append("-" * 40)
-        for log in self.detailed_logs:
-            timestamp = log["timestamp"][:19].replace("T", " ")
-            output.append(f"[{timestamp}] {log['operation']}:")
-            for key, value in log["details"].items():
-                output.append(f"  {key}: {value}")
-            output.append("")
-        
-        return "\n".join(output)
-        
+        yield "DETAILED OPERATION LOGS:"
+        yield "-" * 40
+        for ts, operation, details in islice(zip(self._det_ts, self._det_op, self._det_details), n_detailed):
+            yield f"[{ts.strftime(ts_fmt)}] {operation}:"
+            yield from (f"  {key}: {value}" for key, value in details.items())
+            yield ""
+
+    def iter_logs_as_text(self) -> Iterator[str]:
+        """Export logs as formatted text, yielded in chunks"""
+        return self._chunks(
+            line if i == 0 else "\n" + line
+            for i, line in enumerate(self._text_lines())
+        )
+
+    def export_logs_as_text(self) -> str:
+        """Export logs as formatted text"""
+        return "".join(self.iter_logs_as_text())
+
+    def iter_logs_as_json(self) -> Iterator[str]:
+        """
+        Export logs as JSON, yielded in chunks. The document is framed by hand and
+        each entry dumped on its own, giving the same text as json.dumps(..., indent=2)
+        """
+        n_session = len(self._sess_ts)
+        n_detailed = len(self._det_ts)
+        export_info = {
+            "tool": "ETL Automation Tool v2.0",
+            "export_date": datetime.now().isoformat(),
+            "total_session_logs": n_session,
+            "total_detailed_logs": n_detailed
+        }
+        session_logs = (
+            {"timestamp": ts.isoformat(), "level": level, "message": message}
+            for ts, level, message in islice(zip(self._sess_ts, self._sess_level, self._sess_msg), n_session)
+        )
+        detailed_logs = (
+            {"timestamp": ts.isoformat(), "operation": operation, "details": details}
+            for ts, operation, details in islice(zip(self._det_ts, self._det_op, self._det_details), n_detailed)
+        )
+
+        def pieces() -> Iterator[str]:
+            yield '{\n  "export_info": ' + json.dumps(export_info, indent=2).replace("\n", "\n  ")
+            for key, entries in (("session_logs", session_logs), ("detailed_logs", detailed_logs)):
+                yield f',\n  "{key}": ['
+                empty = True
+                for entry in entries:
+                    yield ("\n    " if empty else ",\n    ") + json.dumps(entry, indent=2).replace("\n", "\n    ")
+                    empty = False
+                yield "]" if empty else "\n  ]"
+            yield "\n}"
+
+        return self._chunks(pieces())
+
     def export_logs_as_json(self) -> str:
         """Export logs as JSON"""
-        export_data = {
-            "export_info": {
-                "tool": "ETL Automation Tool v2.0",
-                "export_date": datetime.now().isoformat(),
-                "total_session_logs": len(self.session_logs),
-                "total_detailed_logs": len(self.detailed_logs)
-            },
-            "session_logs": self.session_logs,
-            "detailed_logs": self.detailed_logs
-        }
-        return json.dumps(export_data, indent=2)
-        
-    def export_logs_as_csv(self) -> str:
-        """Export logs as CSV"""
-        # Combine all logs into a single DataFrame
-        all_logs = []
-        
-        # Add session logs
-        for log in self.session_logs:
-            all_logs.append({
-                "timestamp": log["timestamp"],
-                "type": "SESSION",
-                "level": log["level"],
-                "operation": "SESSION_LOG",
-                "message": log["message"],
-                "details": ""
-            })
+        return "".join(self.iter_logs_as_json())
+
+    def _csv_frame(self) -> pd.DataFrame:
+        """Session and detailed logs as one frame, merged in timestamp order"""
+        n_session = len(self._sess_ts)
+        n_detailed = len(self._det_ts)
         
-        # Add detailed logs
-        for log in self.detailed_logs:
-            details_str = "; ".join([f"{k}={v}" for k, v in log["details"].items()])
-            all_logs.append({
-                "timestamp": log["timestamp"],
-                "type": "DETAILED",
-                "level": "INFO",
-                "operation": log["operation"],
-                "message": "",
-                "details": details_str
-            })
+        session_df = pd.DataFrame({
+            "timestamp": [ts.isoformat() for ts in self._sess_ts],
+            "type": "SESSION",
+            "level": self._sess_level,
+            "operation": "SESSION_LOG",
+            "message": self._sess_msg,
+            "details": ""
+        })
+        detailed_df = pd.DataFrame({
+            "timestamp": [ts.isoformat() for ts in self._det_ts],
+            "type": "DETAILED",
+            "level": "INFO",
+            "operation": self._det_op,
+            "message": "",
+            "details": ["; ".join([f"{k}={v}" for k, v in details.items()]) for details in self._det_details]
+        })
+        df = pd.concat([session_df, detailed_df], ignore_index=True)
         
-        # Create DataFrame and export to CSV
-        df = pd.DataFrame(all_logs)
-        df = df.sort_values("timestamp")
+        # Both streams are already sorted by timestamp: merge them instead of sorting
+        if n_session and n_detailed:
+            detailed_pos = (
+                np.searchsorted(
+                    np.array(self._sess_ts, dtype="datetime64[us]"),
+                    np.array(self._det_ts, dtype="datetime64[us]"),
+                    side="right"
+                )
+                + np.arange(n_detailed)
+            )
+            is_detailed = np.zeros(n_session + n_detailed, dtype=bool)
+            is_detailed[detailed_pos] = True
+            order = np.empty(n_session + n_detailed, dtype=np.intp)
+            order[detailed_pos] = np.arange(n_session, n_session + n_detailed)
+            order[~is_detailed] = np.arange(n_session)
+            df = df.iloc[order]
         
-        # Export to CSV string
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        return output.getvalue()
+        return df
+
+    def iter_logs_as_csv(self) -> Iterator[str]:
+        """Export logs as CSV, encoded and yielded LOG_EXPORT_CSV_ROWS rows at a time"""
+        df = self._csv_frame()
+        yield df.iloc[:0].to_csv(index=False)
+        for start in range(0, len(df), LOG_EXPORT_CSV_ROWS):
+            yield df.iloc[start:start + LOG_EXPORT_CSV_ROWS].to_csv(index=False, header=False)
+
+    def export_logs_as_csv(self) -> str:
+        """Export logs as CSV"""
+        return "".join(self.iter_logs_as_csv())
         
     def clear_logs(self):
         """Clear all logs"""
-        self.session_logs.clear()
-        self.detailed_logs.clear()
+        for column in (self._sess_ts, self._sess_level, self._sess_msg,
+                       self._det_ts, self._det_op, self._det_details):
+            column.clear()
         
     def get_log_summary(self) -> Dict[str, Any]:
         """Get summary of current logs"""
+        latest_session = None
+        if self._sess_ts:
+            latest_session = {
+                "timestamp": self._sess_ts[-1].isoformat(),
+                "level": self._sess_level[-1],
+                "message": self._sess_msg[-1]
+            }
+        latest_detailed = None
+        if self._det_ts:
+            latest_detailed = {
+                "timestamp": self._det_ts[-1].isoformat(),
+                "operation": self._det_op[-1],
+                "details": self._det_details[-1]
+            }
         return {
-            "session_logs_count": len(self.session_logs),
-            "detailed_logs_count": len(self.detailed_logs),
-            "latest_session_log": self.session_logs[-1] if self.session_logs else None,
-            "latest_detailed_log": self.detailed_logs[-1] if self.detailed_logs else None
+            "session_logs_count": len(self._sess_ts),
+            "detailed_logs_count": len(self._det_ts),
+            "latest_session_log": latest_session,
+            "latest_detailed_log": latest_detailed
         }
 
 # Global log manager instance
@@ -1,10 +1,13 @@
 """
 Master BOM update functionality based on activation status
 """
+import numpy as np
 import pandas as pd
 from typing import Tuple, Dict, Any, List
 import logging
 
+from .preprocessing import master_key_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,17 +41,35 @@ class MasterBOMUpdater:
             "duplicates": []
         }
         
-        # Work with copies
-        updated_master = master_df.copy()
-        processed_target = target_df.copy()
-        
         # Ensure ACTIVATION_STATUS column exists
-        if 'ACTIVATION_STATUS' not in processed_target.columns:
+        if 'ACTIVATION_STATUS' not in target_df.columns:
             raise ValueError("Target data must have ACTIVATION_STATUS column")
         
+        if lookup_column not in master_df.columns:
+            raise ValueError(f"Lookup column '{lookup_column}' not found in Master BOM")
+        
+        # Only the lookup column is written to: copy it and share every other
+        # column with master_df. target_df is only read.
+        updated_master = master_df.copy(deep=False)
+        updated_master[lookup_column] = master_df[lookup_column].copy()
+        
+        # Hash index of master keys -> position of their first row, cached per master frame
+        # (updated_master shares master_df's rows and key column)
+        key_idx = master_key_index(master_df, key_column)
+        
+        # Columns copied from target into new master records, resolved once
+        master_cols = list(updated_master.columns)
+        cols_to_copy = [
+            col for col in target_df.columns
+            if col in updated_master.columns and col != 'ACTIVATION_STATUS'
+        ]
+        
+        # New rows are collected per status and appended once at the end
+        pending_inserts = []
+        
         # Process each status type
         for status in ['X', 'D', '0', 'NOT_FOUND']:
-            status_records = processed_target[processed_target['ACTIVATION_STATUS'] == status]
+            status_records = target_df[target_df['ACTIVATION_STATUS'] == status]
             
             if len(status_records) == 0:
                 continue
@@ -62,25 +83,31 @@ class MasterBOMUpdater:
             elif status == 'D':
                 # Update existing records in Master BOM
                 updated_count = MasterBOMUpdater._update_existing_records(
-                    updated_master, status_records, lookup_column, key_column
+                    updated_master, status_records, lookup_column, key_column, key_idx
                 )
                 stats["updated_count"] += updated_count
                 
             elif status == '0':
                 # Check for duplicates, insert if not duplicate
-                duplicates, inserted_count = MasterBOMUpdater._handle_zero_status(
-                    updated_master, status_records, key_column
+                duplicates, new_rows = MasterBOMUpdater._handle_zero_status(
+                    updated_master, status_records, key_column, key_idx, cols_to_copy, master_cols
                 )
+                pending_inserts.append(new_rows)
                 stats["duplicates"].extend(duplicates)
                 stats["duplicates_count"] += len(duplicates)
-                stats["inserted_count"] += inserted_count
+                stats["inserted_count"] += len(new_rows)
                 
             elif status == 'NOT_FOUND':
                 # Insert as new records
-                inserted_count = MasterBOMUpdater._insert_new_records(
-                    updated_master, status_records, key_column
+                new_rows = MasterBOMUpdater._insert_new_records(
+                    status_records, cols_to_copy, master_cols
                 )
-                stats["inserted_count"] += inserted_count
+                pending_inserts.append(new_rows)
+                stats["inserted_count"] += len(new_rows)
+        
+        # All inserts are collected first and joined in a single concat (never appended one by one)
+        if pending_inserts:
+            updated_master = pd.concat([updated_master, *pending_inserts], ignore_index=True, copy=False)
         
         logger.info(f"Master BOM update completed: {stats}")
         return updated_master, stats
@@ -90,23 +117,20 @@ class MasterBOMUpdater:
         master_df: pd.DataFrame,
         records_to_update: pd.DataFrame,
         lookup_column: str,
-        key_column: str
+        key_column: str,
+        key_idx: pd.Series
     ) -> int:
         """Update existing records in Master BOM where status is 'D'"""
-        updated_count = 0
+        keys = records_to_update[key_column]
         
-        for _, record in records_to_update.iterrows():
-            yazaki_pn = record[key_column]
-            
-            # Find matching record in master
-            mask = master_df[key_column] == yazaki_pn
-            matching_indices = master_df[mask].index
-            
-            if len(matching_indices) > 0:
-                # Update the lookup column value
-                master_df.loc[matching_indices[0], lookup_column] = 'D'
-                updated_count += 1
-                logger.debug(f"Updated {yazaki_pn} with status 'D'")
+        # Every target record whose key exists in master counts as an update,
+        # and only the first master row per key is updated
+        positions = key_idx.loc[keys[keys.isin(key_idx.index)]].to_numpy()
+        lookup_col_pos = master_df.columns.get_loc(lookup_column)
+        master_df.iloc[np.unique(positions), lookup_col_pos] = 'D'
+        
+        updated_count = len(positions)
+        logger.debug(f"Updated {updated_count} records with status 'D'")
         
         return updated_count
     
@@ -114,67 +138,85 @@ class MasterBOMUpdater:
     def _handle_zero_status(
         master_df: pd.DataFrame,
         records_to_check: pd.DataFrame,
-        key_column: str
-    ) -> Tuple[List[Dict], int]:
-        """Handle records with status '0' - check for duplicates"""
-        duplicates = []
-        inserted_count = 0
+        key_column: str,
+        key_idx: pd.Series,
+        cols_to_copy: List[str],
+        master_cols: List[str]
+    ) -> Tuple[List[Dict], pd.DataFrame]:
+        """
+        Handle records with status '0' - check for duplicates
+        Returns: (duplicates, new_rows_to_insert)
+        """
+        keys = records_to_check[key_column]
         
-        for _, record in records_to_check.iterrows():
-            yazaki_pn = record[key_column]
-            
-            # Check if already exists in master
-            existing_records = master_df[master_df[key_column] == yazaki_pn]
+        # A record is a duplicate if it is already in master, or repeats an
+        # earlier record of this batch that is about to be inserted
+        in_master = keys.isin(key_idx.index)
+        repeated = keys.duplicated(keep='first') & ~in_master
+        to_insert = records_to_check[~in_master & ~repeated]
+        
+        new_rows = MasterBOMUpdater._build_new_rows(to_insert, cols_to_copy, master_cols)
+        
+        duplicates = []
+        is_duplicate = in_master | repeated
+        if is_duplicate.any():
+            # Records are built per block with to_dict('records') instead of a Series per row
+            target_records = records_to_check[is_duplicate].to_dict('records')
+            master_records = iter(master_df.iloc[key_idx[keys[in_master]].to_numpy()].to_dict('records'))
+            first_new = new_rows.set_index(key_column, drop=False)
+            batch_records = iter(first_new.loc[keys[repeated]].to_dict('records'))
             
-            if len(existing_records) > 0:
-                # Found duplicate - add to duplicates list
-                duplicate_info = {
-                    "YAZAKI_PN": yazaki_pn,
+            for record, from_master in zip(target_records, in_master[is_duplicate].to_numpy()):
+                duplicates.append({
+                    "YAZAKI_PN": record[key_column],
                     "Source": "Target Sheet",
                     "Existing_In_Master": True,
-                    "Master_Record": existing_records.iloc[0].to_dict(),
-                    "Target_Record": record.to_dict()
-                }
-                duplicates.append(duplicate_info)
-            else:
-                # No duplicate found - insert as new record
-                new_record = MasterBOMUpdater._prepare_new_record(record, master_df)
-                master_df.loc[len(master_df)] = new_record
-                inserted_count += 1
-                logger.debug(f"Inserted new record for {yazaki_pn}")
-        
-        return duplicates, inserted_count
+                    "Master_Record": next(master_records) if from_master else next(batch_records),
+                    "Target_Record": record
+                })
+        
+        logger.debug(f"Found {len(duplicates)} duplicates, {len(new_rows)} new records to insert")
+        return duplicates, new_rows
     
     @staticmethod
     def _insert_new_records(
-        master_df: pd.DataFrame,
         records_to_insert: pd.DataFrame,
-        key_column: str
-    ) -> int:
-        """Insert new records for NOT_FOUND status"""
-        inserted_count = 0
-        
-        for _, record in records_to_insert.iterrows():
-            new_record = MasterBOMUpdater._prepare_new_record(record, master_df)
-            master_df.loc[len(master_df)] = new_record
-            inserted_count += 1
-            logger.debug(f"Inserted NOT_FOUND record for {record[key_column]}")
-        
-        return inserted_count
+        cols_to_copy: List[str],
+        master_cols: List[str]
+    ) -> pd.DataFrame:
+        """Build new records for NOT_FOUND status"""
+        new_rows = MasterBOMUpdater._build_new_rows(records_to_insert, cols_to_copy, master_cols)
+        logger.debug(f"Prepared {len(new_rows)} NOT_FOUND records for insertion")
+        return new_rows
     
     @staticmethod
-    def _prepare_new_record(source_record: pd.Series, master_df: pd.DataFrame) -> pd.Series:
+    def _build_new_rows(
+        source_records: pd.DataFrame,
+        cols_to_copy: List[str],
+        master_cols: List[str]
+    ) -> pd.DataFrame:
+        """Prepare all new records of a batch as one DataFrame with master's columns"""
+        return pd.DataFrame.from_records(
+            [
+                MasterBOMUpdater._prepare_new_record(record, cols_to_copy, master_cols)
+                for record in source_records[cols_to_copy].to_dict('records')
+            ],
+            columns=master_cols
+        )
+    
+    @staticmethod
+    def _prepare_new_record(
+        source_record: Dict[str, Any],
+        cols_to_copy: List[str],
+        master_cols: List[str]
+    ) -> Dict[str, Any]:
         """Prepare a new record for insertion into Master BOM"""
-        # Create a new record with the same structure as master
-        new_record = pd.Series(index=master_df.columns, dtype=object)
-        
-        # Fill with default values
-        new_record = new_record.fillna('')
+        # Same structure as master, filled with default values
+        new_record = dict.fromkeys(master_cols, '')
         
         # Copy available data from source record
-        for col in source_record.index:
-            if col in new_record.index and col != 'ACTIVATION_STATUS':
-                new_record[col] = source_record[col]
+        for col in cols_to_copy:
+            new_record[col] = source_record[col]
         
         return new_record
 
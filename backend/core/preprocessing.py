@@ -2,12 +2,102 @@
 Enhanced preprocessing functionality with better column suggestion and lookup
 """
 import pandas as pd
-from difflib import SequenceMatcher
-from typing import Tuple, Dict, Any
+import numpy as np
+from collections import defaultdict
+from functools import lru_cache
+from rapidfuzz import fuzz, process
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
 import logging
+import weakref
 
 logger = logging.getLogger(__name__)
 
+# Number of per-record lines kept in the lookup detailed log
+DETAILED_LOG_LIMIT = 50
+
+
+@lru_cache(maxsize=32)
+def _index_columns(columns: Tuple[str, ...]) -> Dict[Tuple[str, str], List[str]]:
+    """Group columns by (first 3 parts, last part) of their '_'-separated name, upper-cased"""
+    index = defaultdict(list)
+    for col in columns:
+        parts = col.split('_')
+        if len(parts) >= 3:
+            index[('_'.join(parts[:3]).upper(), parts[-1].upper())].append(col)
+    return dict(index)
+
+
+class MasterLookup(NamedTuple):
+    """Deduplicated master keys with their lookup values"""
+    keys: pd.Index
+    values: np.ndarray
+
+
+# (id(master_df), key_col, lookup_col, len(master_df)) -> (weakref to master_df, MasterLookup)
+_lookup_cache: Dict[Tuple[int, str, str, int], Tuple[weakref.ref, MasterLookup]] = {}
+
+# (id(master_df), key_col, len(master_df)) -> (weakref to master_df, key -> first row position)
+_key_index_cache: Dict[Tuple[int, str, int], Tuple[weakref.ref, pd.Series]] = {}
+
+
+def _cached_for_frame(cache: Dict, cache_key: Tuple, df: pd.DataFrame, build: Callable[[], Any]) -> Any:
+    """
+    Return build() once per frame object; later calls with the same frame reuse it.
+    The frame must not be modified in place afterwards. Entries are dropped when it is garbage collected
+    """
+    cached = cache.get(cache_key)
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+
+    value = build()
+
+    def _evict(ref):
+        if cache.get(cache_key, (None,))[0] is ref:
+            del cache[cache_key]
+
+    cache[cache_key] = (weakref.ref(df, _evict), value)
+    return value
+
+
+def _get_master_lookup(master_df: pd.DataFrame, key_col: str, lookup_col: str) -> MasterLookup:
+    """Build the master lookup (deduplicated keys and their lookup values) once per master frame"""
+    def build() -> MasterLookup:
+        keys = pd.Index(master_df[key_col])
+        values = master_df[lookup_col].to_numpy(dtype=object)
+
+        # Already unique keys need no deduplication; the Index hash table built here is reused for lookups
+        if not keys.is_unique:
+            first = ~keys.duplicated(keep='first')
+            keys, values = keys[first], values[first]
+
+        return MasterLookup(keys=keys, values=values)
+
+    return _cached_for_frame(_lookup_cache, (id(master_df), key_col, lookup_col, len(master_df)), master_df, build)
+
+
+def master_key_index(master_df: pd.DataFrame, key_col: str) -> pd.Series:
+    """
+    Map each master key to the position of its first row, built once per master frame.
+    The returned Series is shared between callers and must not be modified
+    """
+    def build() -> pd.Series:
+        key_idx = pd.Series(np.arange(len(master_df)), index=master_df[key_col].to_numpy())
+        return key_idx[~key_idx.index.duplicated(keep='first')]
+
+    return _cached_for_frame(_key_index_cache, (id(master_df), key_col, len(master_df)), master_df, build)
+
+
+def _lookup_positions(master_keys: pd.Index, keys: pd.Series) -> np.ndarray:
+    """
+    Position of each key in the unique master keys, -1 when absent.
+    Categorical keys are resolved per category and gathered by code
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        category_positions = master_keys.get_indexer(keys.cat.categories)
+        codes = keys.cat.codes.to_numpy()
+        return np.where(codes >= 0, category_positions[codes], -1)
+    return master_keys.get_indexer(keys)
+
 
 class DataProcessor:
     """Handles data preprocessing and lookup operations"""
@@ -27,25 +117,20 @@ class DataProcessor:
             prefix = '_'.join(parts[:3])  # First 3 parts
             suffix = parts[-1]  # Last part
             
-            best, best_score = input_name, 0
-            for col in columns:
-                # Check if column starts with prefix and ends with suffix
-                if col.upper().startswith(prefix.upper()) and col.upper().endswith(suffix.upper()):
-                    score = SequenceMatcher(None, input_name.lower(), col.lower()).ratio()
-                    if score >= 0.9 and score > best_score:  # 90% threshold
-                        best, best_score = col, score
-            
-            if best_score > 0:
-                return best, best_score
+            # Columns sharing the same prefix and suffix, from a cached index of the column list
+            candidates = _index_columns(tuple(columns)).get((prefix.upper(), suffix.upper()), [])
+            match = process.extractOne(
+                input_name, candidates, scorer=fuzz.ratio, processor=str.lower, score_cutoff=90  # 90% threshold
+            )
+            if match is not None:
+                return match[0], match[1] / 100
         
         # Fallback to similarity matching
-        best, best_score = input_name, 0
-        for col in columns:
-            score = SequenceMatcher(None, input_name.lower(), col.lower()).ratio()
-            if score > best_score:
-                best, best_score = col, score
+        match = process.extractOne(input_name, columns, scorer=fuzz.ratio, processor=str.lower)
+        if match is None or match[1] == 0:
+            return input_name, 0
         
-        return best, best_score
+        return match[0], match[1] / 100
     
     @staticmethod
     def add_activation_status(
@@ -62,23 +147,19 @@ class DataProcessor:
         logger.info(f"📊 Input data: Master BOM ({len(master_df)} records), Target sheet ({len(target_df)} records)")
         logger.info(f"🔑 Key column: '{key_col}', Lookup column: '{lookup_col}'")
 
-        # Remove duplicates from master
-        master_clean = master_df.drop_duplicates(subset=[key_col], keep='first')
-        duplicates_removed = len(master_df) - len(master_clean)
+        # Remove duplicates from master and prepare lookup (cached per master frame)
+        lookup = _get_master_lookup(master_df, key_col, lookup_col)
+        duplicates_removed = len(master_df) - len(lookup.keys)
         if duplicates_removed > 0:
             logger.info(f"🧹 Removed {duplicates_removed} duplicate records from Master BOM")
 
-        # Prepare lookup dictionary
-        lookup_series = master_clean[lookup_col]
-        lookup_dict = pd.Series(lookup_series.values, index=master_clean[key_col]).to_dict()
-
-        logger.info(f"📋 Created lookup dictionary with {len(lookup_dict)} unique mappings")
+        logger.info(f"📋 Created lookup dictionary with {len(lookup.keys)} unique mappings")
 
         stats = {
             "master_records": len(master_df),
-            "master_unique_records": len(master_clean),
+            "master_unique_records": len(lookup.keys),
             "target_records": len(target_df),
-            "lookup_dict_size": len(lookup_dict),
+            "lookup_dict_size": len(lookup.keys),
             "duplicates_removed": duplicates_removed,
             "mapping_results": {},
             "detailed_log": []
@@ -86,63 +167,84 @@ class DataProcessor:
         
         df = target_df.copy()
 
-        # Enhanced status mapping with detailed logging
-        def get_status(key):
-            if pd.isna(key):
+        logger.info("🔄 Starting LOCKUP mapping process...")
+
+        # Vectorized mapping: resolve every target key against the unique master keys at once
+        keys = df[key_col]
+        missing_mask = keys.isna().to_numpy()
+        positions = _lookup_positions(lookup.keys, keys)
+        found_mask = (positions >= 0) & ~missing_mask
+
+        values = np.empty(len(df), dtype=object)
+        values[found_mask] = lookup.values[positions[found_mask]]
+
+        null_value_mask = found_mask & pd.isna(values)
+        notfound_mask = ~missing_mask & ~found_mask
+
+        # MISSING_KEY: key is null in target, NOT_FOUND: key not in master, '0': found but value is null.
+        # Filled into the values array in place (the masks are disjoint), so no per-choice temporaries are built
+        status = values
+        status[missing_mask] = "MISSING_KEY"
+        status[notfound_mask] = "NOT_FOUND"
+        status[null_value_mask] = "0"
+
+        # Detailed log: one line per record, built only for the first 50 records shown
+        sample = slice(0, DETAILED_LOG_LIMIT)
+        for key, value, missing, not_found, null_value in zip(
+            keys.to_numpy()[sample], values[sample], missing_mask[sample],
+            notfound_mask[sample], null_value_mask[sample]
+        ):
+            if missing:
                 stats["detailed_log"].append(f"⚠️ Missing key in target record")
-                return "MISSING_KEY"  # Key is missing/null in target
-            elif key in lookup_dict:
-                val = lookup_dict[key]
-                if pd.notna(val):
-                    stats["detailed_log"].append(f"✅ Found '{key}' → '{val}'")
-                    return val
-                else:
-                    stats["detailed_log"].append(f"⚠️ Found '{key}' but value is null → '0'")
-                    return "0"  # Found key, but value is null
-            else:
+            elif not_found:
                 stats["detailed_log"].append(f"❌ Key '{key}' not found in Master BOM → 'NOT_FOUND'")
-                return "NOT_FOUND"  # Key not found in master
-
-        logger.info("🔄 Starting LOCKUP mapping process...")
+            elif null_value:
+                stats["detailed_log"].append(f"⚠️ Found '{key}' but value is null → '0'")
+            else:
+                stats["detailed_log"].append(f"✅ Found '{key}' → '{value}'")
 
-        # Apply custom mapping logic
-        df.insert(1, 'ACTIVATION_STATUS', df[key_col].apply(get_status))
+        # Stored as categorical: each distinct status is kept once and rows hold integer codes
+        codes, uniques = pd.factorize(status)
+        df.insert(1, 'ACTIVATION_STATUS', pd.Categorical.from_codes(codes, categories=uniques))
 
         logger.info("✅ LOCKUP mapping completed")
 
-        # Calculate mapping statistics
-        status_counts = df['ACTIVATION_STATUS'].value_counts().to_dict()
+        # Calculate mapping statistics: counts and percentages in one pass over the status codes
+        counts = np.bincount(codes, minlength=len(uniques))
+        order = np.argsort(-counts, kind='stable')  # Most frequent first, like value_counts
+        total = len(df)
+        status_counts = {}
+        mapping_percentages = {}
+        for status, count in zip(uniques[order].tolist(), counts[order].tolist()):
+            status_counts[status] = count
+            mapping_percentages[status] = round((count / total) * 100, 2)
         stats["mapping_results"] = status_counts
-        stats["total_processed"] = len(df)
-
-        # Log detailed results
-        logger.info("📊 LOCKUP Results Summary:")
-        for status, count in status_counts.items():
-            percentage = round((count / len(df)) * 100, 2)
-            logger.info(f"   {status}: {count} records ({percentage}%)")
-
-        # Limit detailed log to first 50 entries for performance
-        if len(stats["detailed_log"]) > 50:
-            stats["detailed_log"] = stats["detailed_log"][:50] + [f"... and {len(stats['detailed_log']) - 50} more entries"]
+        stats["total_processed"] = total
+
+        # Log detailed results as a single entry, formatted only when INFO is enabled
+        if logger.isEnabledFor(logging.INFO):
+            summary_lines = [
+                f"   {status}: {count} records ({mapping_percentages[status]}%)"
+                for status, count in status_counts.items()
+            ]
+            logger.info("\n".join(["📊 LOCKUP Results Summary:", *summary_lines]))
+
+        # Detailed log is limited to the first 50 entries for performance
+        if len(df) > DETAILED_LOG_LIMIT:
+            stats["detailed_log"].append(f"... and {len(df) - DETAILED_LOG_LIMIT} more entries")
         
-        # Calculate percentages
-        total = len(df)
-        stats["mapping_percentages"] = {
-            status: round((count / total) * 100, 2) 
-            for status, count in status_counts.items()
-        }
+        stats["mapping_percentages"] = mapping_percentages
         
-        logger.info(f"Lookup completed: {stats}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Lookup completed: {stats}")
         
         return df, stats
     
     @staticmethod
     def get_column_suggestions(master_df: pd.DataFrame, start_col: int = 1, end_col: int = 22) -> list:
         """Get permissible columns for lookup from master dataframe"""
-        columns = list(master_df.columns)
-        # Return columns within the specified range, ensuring we don't go out of bounds
-        end_idx = min(end_col, len(columns))
-        return columns[start_col:end_idx]
+        # Return columns within the specified range (slicing already clamps to the bounds)
+        return master_df.columns[start_col:end_col].tolist()
 
 
 # Global processor instance
@@ -3,11 +3,20 @@ Processing Preview Module for ETL Automation Tool
 Provides preview of changes before applying them to Master BOM
 """
 import pandas as pd
+import numpy as np
 from typing import Dict, Any, List, Tuple
 import logging
 
+from .preprocessing import data_processor, master_key_index
+
 logger = logging.getLogger(__name__)
 
+# Number of sample records shown per preview section
+PREVIEW_LIMIT = 10
+
+# Identifying columns kept in preview record payloads (with the key and lookup columns)
+PREVIEW_COLUMNS = ("YAZAKI PN", "ACTIVATION_STATUS")
+
 class ProcessingPreview:
     """Generate preview of processing changes before applying them"""
     
@@ -21,15 +30,11 @@ class ProcessingPreview:
         """Generate comprehensive preview of all changes that will be made"""
         
         try:
-            # Create copies to avoid modifying originals
-            master_copy = master_df.copy()
-            target_copy = target_df.copy()
-            
+            # Preview only reads the inputs, so no defensive copies are made
             # Perform lookup to get activation statuses
-            from .preprocessing import DataProcessor
-            processor = DataProcessor()
-            
-            lookup_result = processor.perform_lookup(master_copy, target_copy, lookup_column, key_column)
+            lookup_result, _ = data_processor.add_activation_status(
+                master_df, target_df, key_column, lookup_column
+            )
             
             # Analyze what changes will be made
             preview_data = {
@@ -38,7 +43,7 @@ class ProcessingPreview:
                 "inserted_records_preview": [],
                 "duplicates_preview": [],
                 "statistics": {
-                    "total_target_records": len(target_copy),
+                    "total_target_records": len(target_df),
                     "records_to_update": 0,
                     "records_to_insert": 0,
                     "duplicates_found": 0,
@@ -46,21 +51,36 @@ class ProcessingPreview:
                 }
             }
             
-            # Group records by activation status
-            status_groups = lookup_result.groupby('ACTIVATION_STATUS')
+            # Master key -> row position, cached per master frame
+            key_idx = master_key_index(master_df, key_column)
+            
+            # Split records by activation status with one mask per status the preview acts on,
+            # in the order groupby used to yield them; other lookup values are never materialized
+            statuses = lookup_result['ACTIVATION_STATUS']
             
-            for status, group in status_groups:
+            for status in ('0', 'D', 'NOT_FOUND', 'X'):
+                status_mask = (statuses == status).to_numpy()
+                if not status_mask.any():
+                    continue
+                
+                if status == 'X':
+                    # Records that will be skipped
+                    preview_data["statistics"]["records_to_skip"] = int(status_mask.sum())
+                    continue
+                
+                group = lookup_result[status_mask]
+                
                 if status == 'D':
                     # Records that will be updated (D → X)
                     preview_data["statistics"]["records_to_update"] = len(group)
                     preview_data["updated_records_preview"] = ProcessingPreview._preview_updates(
-                        master_copy, group, lookup_column, key_column
+                        master_df, group, lookup_column, key_column, key_idx
                     )
                 
                 elif status == '0':
                     # Records that need duplicate checking
                     duplicates, new_records = ProcessingPreview._preview_zero_status(
-                        master_copy, group, key_column
+                        master_df, group, lookup_column, key_column, key_idx
                     )
                     preview_data["duplicates_preview"] = duplicates
                     preview_data["statistics"]["duplicates_found"] = len(duplicates)
@@ -72,10 +92,6 @@ class ProcessingPreview:
                     new_records = ProcessingPreview._preview_new_records(group, lookup_column)
                     preview_data["inserted_records_preview"].extend(new_records)
                     preview_data["statistics"]["records_to_insert"] += len(new_records)
-                
-                elif status == 'X':
-                    # Records that will be skipped
-                    preview_data["statistics"]["records_to_skip"] = len(group)
             
             # Generate summary
             preview_data["changes_summary"] = {
@@ -95,25 +111,36 @@ class ProcessingPreview:
             logger.error(f"Error generating preview: {e}")
             raise
     
+    @staticmethod
+    def _preview_columns(df: pd.DataFrame, *extra_columns: str) -> List[str]:
+        """Columns of df shown in previews: PREVIEW_COLUMNS plus the given ones, deduplicated"""
+        wanted = dict.fromkeys((*PREVIEW_COLUMNS, *extra_columns))
+        return [col for col in wanted if col in df.columns]
+    
     @staticmethod
     def _preview_updates(
         master_df: pd.DataFrame, 
         records_to_update: pd.DataFrame, 
         lookup_column: str, 
-        key_column: str
+        key_column: str,
+        key_idx: pd.Series
     ) -> List[Dict[str, Any]]:
         """Preview records that will be updated (D → X)"""
         
         updates_preview = []
+        lookup_values = master_df[lookup_column].to_numpy() if lookup_column in master_df.columns else None
+        preview_cols = ProcessingPreview._preview_columns(records_to_update, key_column, lookup_column)
+        key_pos = preview_cols.index(key_column)
         
-        for _, record in records_to_update.iterrows():
-            yazaki_pn = record[key_column]
+        # Plain tuples instead of a Series per row
+        for row in records_to_update[preview_cols].itertuples(index=False, name=None):
+            yazaki_pn = row[key_pos]
             
             # Find matching record in master
-            master_match = master_df[master_df[key_column] == yazaki_pn]
+            position = key_idx.get(yazaki_pn)
             
-            if len(master_match) > 0:
-                current_value = master_match.iloc[0][lookup_column] if lookup_column in master_match.columns else 'N/A'
+            if position is not None:
+                current_value = lookup_values[position] if lookup_values is not None else 'N/A'
                 
                 updates_preview.append({
                     "YAZAKI_PN": yazaki_pn,
@@ -121,65 +148,83 @@ class ProcessingPreview:
                     "Current_Value": current_value,
                     "New_Value": "X",
                     "Column": lookup_column,
-                    "Record_Data": record.to_dict()
+                    "Record_Data": dict(zip(preview_cols, row))
                 })
+                
+                # Limit to first 10 for preview
+                if len(updates_preview) >= PREVIEW_LIMIT:
+                    break
         
-        return updates_preview[:10]  # Limit to first 10 for preview
+        return updates_preview
     
     @staticmethod
     def _preview_zero_status(
         master_df: pd.DataFrame, 
         records_to_check: pd.DataFrame, 
-        key_column: str
+        lookup_column: str,
+        key_column: str,
+        key_idx: pd.Series
     ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """Preview records with status '0' - identify duplicates and new records"""
         
-        duplicates = []
-        new_records = []
+        preview_cols = ProcessingPreview._preview_columns(records_to_check, key_column, lookup_column)
+        master_preview = master_df[ProcessingPreview._preview_columns(master_df, key_column, lookup_column)]
         
-        for _, record in records_to_check.iterrows():
-            yazaki_pn = record[key_column]
-            
-            # Check if already exists in master
-            existing_records = master_df[master_df[key_column] == yazaki_pn]
-            
-            if len(existing_records) > 0:
-                # Found duplicate
-                duplicates.append({
-                    "YAZAKI_PN": yazaki_pn,
-                    "Action": "Duplicate Found",
-                    "Source": "Target Sheet",
-                    "Existing_In_Master": True,
-                    "Master_Record": existing_records.iloc[0].to_dict(),
-                    "Target_Record": record.to_dict()
-                })
-            else:
-                # Will be inserted as new
-                new_records.append({
-                    "YAZAKI_PN": yazaki_pn,
-                    "Action": "Insert New (Status 0)",
-                    "Filtered_Column_Value": "X",
-                    "Record_Data": record.to_dict()
-                })
+        # Check which records already exist in master with a single membership test
+        keys = records_to_check[key_column]
+        in_master = keys.isin(key_idx.index).to_numpy()
+        duplicate_rows = np.flatnonzero(in_master)[:PREVIEW_LIMIT]
+        new_rows = np.flatnonzero(~in_master)[:PREVIEW_LIMIT]
+        
+        records_view = records_to_check[preview_cols]
+        duplicate_keys = keys.iloc[duplicate_rows]
+        master_records = master_preview.iloc[key_idx.loc[duplicate_keys].to_numpy()].to_dict('records')
+        
+        # Found duplicates
+        duplicates = [
+            {
+                "YAZAKI_PN": yazaki_pn,
+                "Action": "Duplicate Found",
+                "Source": "Target Sheet",
+                "Existing_In_Master": True,
+                "Master_Record": master_record,
+                "Target_Record": record
+            }
+            for yazaki_pn, master_record, record in zip(
+                duplicate_keys.tolist(), master_records, records_view.iloc[duplicate_rows].to_dict('records')
+            )
+        ]
+        
+        # Will be inserted as new
+        new_records = [
+            {
+                "YAZAKI_PN": record[key_column],
+                "Action": "Insert New (Status 0)",
+                "Filtered_Column_Value": "X",
+                "Record_Data": record
+            }
+            for record in records_view.iloc[new_rows].to_dict('records')
+        ]
         
-        return duplicates[:10], new_records[:10]  # Limit for preview
+        return duplicates, new_records
     
     @staticmethod
     def _preview_new_records(records_to_insert: pd.DataFrame, lookup_column: str) -> List[Dict[str, Any]]:
         """Preview records that will be inserted as new (NOT_FOUND status)"""
         
         new_records = []
+        preview_cols = ProcessingPreview._preview_columns(records_to_insert, lookup_column)
         
-        for _, record in records_to_insert.iterrows():
+        for record in records_to_insert[preview_cols].head(PREVIEW_LIMIT).to_dict('records'):
             new_records.append({
                 "YAZAKI_PN": record.get('YAZAKI PN', 'N/A'),
                 "Action": "Insert New (NOT_FOUND)",
                 "Filtered_Column_Value": "X",
                 "Column": lookup_column,
-                "Record_Data": record.to_dict()
+                "Record_Data": record
             })
         
-        return new_records[:10]  # Limit for preview
+        return new_records  # Limited to PREVIEW_LIMIT above
     
     @staticmethod
     def _assess_risk_level(statistics: Dict[str, int]) -> str:
@@ -2,16 +2,71 @@
 SharePoint integration for ETL Automation Tool v2.0
 Handles authentication and file operations with SharePoint
 """
+import asyncio
+import hashlib
 import os
-import pandas as pd
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from operator import itemgetter
+from typing import Optional, Dict, Any, List, Tuple
 import logging
-import tempfile
-import shutil
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote
 
 logger = logging.getLogger(__name__)
 
+# File properties fetched when listing a folder ($select)
+FILE_LIST_FIELDS = ["Name", "Length", "TimeLastModified", "ServerRelativeUrl"]
+
+# Web properties needed to confirm a sign-in worked
+WEB_CHECK_FIELDS = ["Title"]
+
+# Tenant name in a SharePoint Online site URL
+_TENANT_RE = re.compile(r'https://([^.]+)\.sharepoint\.com')
+
+# Upper bound on files returned by one filtered query ($top)
+MAX_FILES_PER_QUERY = 5000
+
+# Chunk size for streamed transfers
+TRANSFER_CHUNK_SIZE = 1024 * 1024
+
+# Chunk size for SharePoint upload/download sessions
+SESSION_CHUNK_SIZE = 10 * 1024 * 1024
+
+# Authenticated contexts shared by all clients of the process:
+# (site_url, username, password digest) -> (ClientContext, access_token, token_expires_at)
+_CTX_CACHE: Dict[Tuple[str, str, str], Tuple[Any, str, float]] = {}
+_CTX_LOCK = threading.Lock()
+
+# Seconds before token expiry at which a cached context is no longer reused
+TOKEN_EXPIRY_MARGIN = 300
+
+# Persisted MSAL token cache, so sign-in is only interactive on first use
+TOKEN_CACHE_PATH = Path(os.environ.get("ETL_MSAL_TOKEN_CACHE", Path.home() / ".etl_tool_msal_cache.json"))
+
+
+@lru_cache(maxsize=1)
+def _msal():
+    """Import msal once per process (optional dependency, raises ImportError if missing)"""
+    import msal
+    return msal
+
+
+@lru_cache(maxsize=1)
+def _client_context_cls():
+    """Import office365's ClientContext once per process (optional dependency, raises ImportError if missing)"""
+    from office365.sharepoint.client_context import ClientContext
+    return ClientContext
+
+
+def _odata_literal(value: str) -> str:
+    """Escape a value for use inside a quoted OData string literal"""
+    return value.replace("'", "''")
+
+
 class SharePointClient:
     """SharePoint client for file operations"""
     
@@ -21,14 +76,32 @@ class SharePointClient:
         self.password = password
         self.ctx = None
         self.authenticated = False
+        self.access_token = None  # Set by the MSAL flows, used by the async REST calls
+        self.token_expires_at = None  # time.monotonic() deadline of access_token
+        self._http_session = None
+        self._http_session_loop = None
+        self._reauth_lock = None
     
     def authenticate(self) -> bool:
         """Authenticate with SharePoint using modern authentication only"""
         try:
+            # Reuse a context already authenticated in this process while its token is valid;
+            # the password is part of the key, so a wrong one never gets a cached context
+            cache_key = (self.site_url, self.username, self._credential_digest())
+            with _CTX_LOCK:
+                cached = _CTX_CACHE.get(cache_key)
+            if cached is not None and time.monotonic() < cached[2]:
+                self.ctx, self.access_token, self.token_expires_at = cached
+                self.authenticated = True
+                logger.info("♻️ Reusing authenticated SharePoint context")
+                return True
+
             # For modern SharePoint tenants like uit.ac.ma, only MSAL works
             logger.info("🔐 Using modern authentication (MSAL) for uit.ac.ma tenant...")
             success = self._authenticate_custom_tenant()
             if success:
+                with _CTX_LOCK:
+                    _CTX_CACHE[cache_key] = (self.ctx, self.access_token, self.token_expires_at)
                 return True
 
             logger.error("❌ Modern authentication failed")
@@ -42,11 +115,16 @@ class SharePointClient:
             logger.error(f"❌ Authentication error: {e}")
             return False
     
+    def _credential_digest(self) -> str:
+        """SHA-256 of the sign-in credentials, so the context cache never holds the password itself"""
+        credentials = "\0".join((self.site_url, self.username, self.password or ""))
+        return hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
     def _authenticate_basic(self) -> bool:
         """Basic email + password authentication"""
         try:
             from office365.runtime.auth.authentication_context import AuthenticationContext
-            from office365.sharepoint.client_context import ClientContext
+            ClientContext = _client_context_cls()
             
             ctx_auth = AuthenticationContext(self.site_url)
             if ctx_auth.acquire_token_for_user(self.username, self.password):
@@ -54,7 +132,7 @@ class SharePointClient:
                 
                 # Test connection
                 web = self.ctx.web
-                self.ctx.load(web)
+                self.ctx.load(web, WEB_CHECK_FIELDS)
                 self.ctx.execute_query()
                 
                 logger.info(f"✅ Basic authentication successful! Site: {web.title}")
@@ -72,7 +150,7 @@ class SharePointClient:
         """Username/Password authentication with UserCredential"""
         try:
             from office365.runtime.auth.user_credential import UserCredential
-            from office365.sharepoint.client_context import ClientContext
+            ClientContext = _client_context_cls()
 
             # Create user credential
             credentials = UserCredential(self.username, self.password)
@@ -80,7 +158,7 @@ class SharePointClient:
 
             # Test connection
             web = self.ctx.web
-            self.ctx.load(web)
+            self.ctx.load(web, WEB_CHECK_FIELDS)
             self.ctx.execute_query()
 
             logger.info(f"✅ Username/Password authentication successful! Site: {web.title}")
@@ -94,31 +172,26 @@ class SharePointClient:
     def _authenticate_custom_tenant(self) -> bool:
         """Custom authentication for uit.ac.ma tenant"""
         try:
-            import msal
-            from office365.sharepoint.client_context import ClientContext
+            ClientContext = _client_context_cls()
 
             # Custom configuration for uit.ac.ma tenant
             client_id = "9bc3ab49-b65d-410a-85ad-de819febfddc"  # SharePoint Online Client
             authority = "https://login.microsoftonline.com/uit.ac.ma"
             scopes = ["https://uitacma.sharepoint.com/.default"]
 
-            app = msal.PublicClientApplication(
-                client_id=client_id,
-                authority=authority
-            )
-
-            logger.info("🌐 Opening browser for uit.ac.ma tenant authentication...")
-            result = app.acquire_token_interactive(
-                scopes=scopes,
-                login_hint=self.username
+            result = self._acquire_token(
+                client_id, authority, scopes,
+                "🌐 Opening browser for uit.ac.ma tenant authentication..."
             )
 
             if "access_token" in result:
+                self.access_token = result["access_token"]
+                self.token_expires_at = time.monotonic() + result.get("expires_in", 3600) - TOKEN_EXPIRY_MARGIN
                 self.ctx = ClientContext(self.site_url).with_access_token(result["access_token"])
 
                 # Test connection
                 web = self.ctx.web
-                self.ctx.load(web)
+                self.ctx.load(web, WEB_CHECK_FIELDS)
                 self.ctx.execute_query()
 
                 logger.info(f"✅ Custom tenant authentication successful! Site: {web.title}")
@@ -139,12 +212,10 @@ class SharePointClient:
     def _authenticate_msal(self) -> bool:
         """MSAL interactive authentication with proper tenant handling"""
         try:
-            import msal
-            from office365.sharepoint.client_context import ClientContext
+            ClientContext = _client_context_cls()
 
             # Extract tenant from site URL
-            import re
-            tenant_match = re.search(r'https://([^.]+)\.sharepoint\.com', self.site_url)
+            tenant_match = _TENANT_RE.search(self.site_url)
             if not tenant_match:
                 logger.error("❌ Could not extract tenant from site URL")
                 return False
@@ -156,23 +227,19 @@ class SharePointClient:
             authority = f"https://login.microsoftonline.com/{tenant_name}.onmicrosoft.com"
             scopes = [f"https://{tenant_name}.sharepoint.com/.default"]
 
-            app = msal.PublicClientApplication(
-                client_id=client_id,
-                authority=authority
-            )
-
-            logger.info(f"🌐 Opening browser for authentication (tenant: {tenant_name})...")
-            result = app.acquire_token_interactive(
-                scopes=scopes,
-                login_hint=self.username
+            result = self._acquire_token(
+                client_id, authority, scopes,
+                f"🌐 Opening browser for authentication (tenant: {tenant_name})..."
             )
 
             if "access_token" in result:
+                self.access_token = result["access_token"]
+                self.token_expires_at = time.monotonic() + result.get("expires_in", 3600) - TOKEN_EXPIRY_MARGIN
                 self.ctx = ClientContext(self.site_url).with_access_token(result["access_token"])
 
                 # Test connection
                 web = self.ctx.web
-                self.ctx.load(web)
+                self.ctx.load(web, WEB_CHECK_FIELDS)
                 self.ctx.execute_query()
 
                 logger.info(f"✅ MSAL authentication successful! Site: {web.title}")
@@ -190,28 +257,65 @@ class SharePointClient:
             logger.error(f"❌ MSAL authentication error: {e}")
             return False
     
+    def _acquire_token(self, client_id: str, authority: str, scopes: List[str], browser_message: str) -> Dict[str, Any]:
+        """
+        Acquire an access token from the persisted MSAL cache, refreshing silently when possible.
+        The browser is only opened when no cached account can be used
+        """
+        msal = _msal()
+
+        cache = msal.SerializableTokenCache()
+        if TOKEN_CACHE_PATH.exists():
+            cache.deserialize(TOKEN_CACHE_PATH.read_text())
+
+        app = msal.PublicClientApplication(
+            client_id=client_id,
+            authority=authority,
+            token_cache=cache
+        )
+
+        result = None
+        accounts = app.get_accounts(username=self.username)
+        if accounts:
+            result = app.acquire_token_silent(scopes, account=accounts[0])
+            if result:
+                logger.info("🔑 Using cached SharePoint credentials")
+
+        if not result:
+            logger.info(browser_message)
+            result = app.acquire_token_interactive(
+                scopes=scopes,
+                login_hint=self.username
+            )
+
+        # Persist refresh tokens for the next run, readable by the current user only
+        if cache.has_state_changed:
+            fd = os.open(TOKEN_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as cache_file:
+                cache_file.write(cache.serialize())
+
+        return result
+
     def list_files(self, folder_path: str) -> List[Dict[str, Any]]:
         """List files in SharePoint folder"""
         if not self.authenticated:
             raise Exception("Not authenticated with SharePoint")
         
         try:
-            folder = self.ctx.web.get_folder_by_server_relative_url(folder_path)
-            self.ctx.load(folder)
+            # Load the folder's files directly in a single round-trip, fetching only the listed fields
+            files = self.ctx.web.get_folder_by_server_relative_url(folder_path).files
+            self.ctx.load(files, FILE_LIST_FIELDS)
             self.ctx.execute_query()
             
-            files = folder.files
-            self.ctx.load(files)
-            self.ctx.execute_query()
-            
-            file_list = []
-            for file in files:
-                file_list.append({
+            file_list = [
+                {
                     "name": file.name,
                     "size": file.length,
                     "modified": file.time_last_modified,
                     "url": file.server_relative_url
-                })
+                }
+                for file in files
+            ]
             
             logger.info(f"📁 Found {len(file_list)} files in {folder_path}")
             return file_list
@@ -220,6 +324,37 @@ class SharePointClient:
             logger.error(f"❌ Error listing files: {e}")
             raise
     
+    def _query_files(self, folder_path: str, odata_filter: str):
+        """Queue a filtered load of a folder's files (listed fields only); runs on the next execute"""
+        files = self.ctx.web.get_folder_by_server_relative_url(folder_path).files
+        return files.filter(odata_filter).select(FILE_LIST_FIELDS).top(MAX_FILES_PER_QUERY).get()
+
+    def list_files_filtered(self, folder_path: str, name_prefix: str) -> List[Dict[str, Any]]:
+        """List files in SharePoint folder whose name starts with name_prefix (filtered server-side)"""
+        if not self.authenticated:
+            raise Exception("Not authenticated with SharePoint")
+
+        try:
+            files = self._query_files(folder_path, f"startswith(Name,'{_odata_literal(name_prefix)}')")
+            self.ctx.execute_query()
+
+            file_list = [
+                {
+                    "name": file.name,
+                    "size": file.length,
+                    "modified": file.time_last_modified,
+                    "url": file.server_relative_url
+                }
+                for file in files
+            ]
+
+            logger.info(f"📁 Found {len(file_list)} files starting with '{name_prefix}' in {folder_path}")
+            return file_list
+
+        except Exception as e:
+            logger.error(f"❌ Error listing files: {e}")
+            raise
+
     def download_file(self, folder_path: str, file_name: str, local_path: str) -> bool:
         """Download file from SharePoint to local path"""
         if not self.authenticated:
@@ -228,9 +363,10 @@ class SharePointClient:
         try:
             file_url = f"{folder_path}/{file_name}"
             
+            # Streamed to disk in ranged chunks instead of one buffered response
             with open(local_path, "wb") as local_file:
                 file = self.ctx.web.get_file_by_server_relative_url(file_url)
-                file.download(local_file).execute_query()
+                file.download_session(local_file, chunk_size=SESSION_CHUNK_SIZE).execute_query()
             
             logger.info(f"✅ Downloaded '{file_name}' to '{local_path}'")
             return True
@@ -245,12 +381,12 @@ class SharePointClient:
             raise Exception("Not authenticated with SharePoint")
         
         try:
-            with open(local_path, "rb") as local_file:
-                content = local_file.read()
-            
+            # Chunked upload session: the file is read and sent 10 MB at a time
             folder = self.ctx.web.get_folder_by_server_relative_url(folder_path)
-            folder.upload_file(file_name, content)
-            self.ctx.execute_query()
+            with open(local_path, "rb") as local_file:
+                folder.files.create_upload_session(
+                    local_file, SESSION_CHUNK_SIZE, file_name=file_name
+                ).execute_query()
             
             logger.info(f"✅ Uploaded '{local_path}' as '{file_name}' to SharePoint")
             return True
@@ -259,38 +395,178 @@ class SharePointClient:
             logger.error(f"❌ Error uploading file '{file_name}': {e}")
             return False
     
-    def create_backup(self, folder_path: str, file_name: str) -> str:
-        """Create a backup of the file with timestamp"""
+    def _get_http_session(self):
+        """
+        Return the shared aiohttp session (one connection pool per client and event loop),
+        creating it on first use. It carries no token: see _auth_headers
+        """
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        if self._http_session is None or self._http_session.closed or self._http_session_loop is not loop:
+            self._http_session = aiohttp.ClientSession(
+                headers={"Accept": "application/json;odata=nometadata"}
+            )
+            self._http_session_loop = loop
+            self._reauth_lock = asyncio.Lock()
+        return self._http_session
+
+    async def _auth_headers(self) -> Dict[str, str]:
+        """Authorization header from the current access token, re-authenticating once it expired"""
+        if not self.access_token:
+            raise Exception("Async file operations require MSAL authentication")
+
+        if self.token_expires_at is not None and time.monotonic() >= self.token_expires_at:
+            # Concurrent transfers wait for a single re-authentication
+            self._get_http_session()
+            async with self._reauth_lock:
+                if time.monotonic() >= self.token_expires_at:
+                    logger.info("🔐 Access token expired, re-authenticating")
+                    if not await asyncio.to_thread(self.authenticate):
+                        raise Exception("SharePoint re-authentication failed")
+
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+    @staticmethod
+    def _odata_path(path: str) -> str:
+        """Escape a server-relative path for use inside an OData string literal"""
+        return quote(path.replace("'", "''"))
+
+    async def download_file_async(self, folder_path: str, file_name: str, local_path: str) -> bool:
+        """Download file from SharePoint to local path without blocking the event loop"""
         if not self.authenticated:
             raise Exception("Not authenticated with SharePoint")
 
         try:
-            # Generate backup filename
-            name, ext = os.path.splitext(file_name)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_name = f"{name}_Backup_{timestamp}{ext}"
-
-            # Download original file
-            temp_dir = tempfile.mkdtemp()
-            temp_file = os.path.join(temp_dir, file_name)
-
-            if self.download_file(folder_path, file_name, temp_file):
-                # Upload as backup
-                if self.upload_file(folder_path, backup_name, temp_file):
-                    logger.info(f"🛡️ Backup created: '{backup_name}'")
-
-                    # Cleanup
-                    shutil.rmtree(temp_dir)
-                    return backup_name
-
-            # Cleanup on failure
-            shutil.rmtree(temp_dir)
-            return None
+            file_url = self._odata_path(f"{folder_path}/{file_name}")
+            url = f"{self.site_url}/_api/web/GetFileByServerRelativeUrl('{file_url}')/$value"
+
+            headers = await self._auth_headers()
+            session = self._get_http_session()
+            async with session.get(url, headers=headers) as response:
+                response.raise_for_status()
+                with open(local_path, "wb") as local_file:
+                    async for chunk in response.content.iter_chunked(TRANSFER_CHUNK_SIZE):
+                        local_file.write(chunk)
+
+            logger.info(f"✅ Downloaded '{file_name}' to '{local_path}'")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Error downloading file '{file_name}': {e}")
+            return False
+
+    async def upload_file_async(self, folder_path: str, file_name: str, local_path: str) -> bool:
+        """Upload file from local path to SharePoint without blocking the event loop"""
+        if not self.authenticated:
+            raise Exception("Not authenticated with SharePoint")
+
+        try:
+            folder_url = self._odata_path(folder_path)
+            target_name = self._odata_path(file_name)
+            url = (
+                f"{self.site_url}/_api/web/GetFolderByServerRelativeUrl('{folder_url}')"
+                f"/Files/add(url='{target_name}',overwrite=true)"
+            )
+
+            headers = await self._auth_headers()
+            session = self._get_http_session()
+            with open(local_path, "rb") as local_file:
+                # aiohttp streams file objects instead of reading them into memory
+                async with session.post(url, data=local_file, headers=headers) as response:
+                    response.raise_for_status()
+
+            logger.info(f"✅ Uploaded '{local_path}' as '{file_name}' to SharePoint")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Error uploading file '{file_name}': {e}")
+            return False
+
+    async def download_many(self, folder_path: str, file_names: List[str], local_dir: str) -> Dict[str, bool]:
+        """
+        Download several files concurrently into local_dir
+        Returns: {file_name: success}
+        """
+        async with asyncio.TaskGroup() as tg:
+            tasks = {
+                name: tg.create_task(self.download_file_async(folder_path, name, os.path.join(local_dir, name)))
+                for name in file_names
+            }
+        return {name: task.result() for name, task in tasks.items()}
+
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+        self._http_session_loop = None
+
+    @staticmethod
+    def _backup_name(file_name: str) -> str:
+        """Generate backup filename"""
+        name, ext = os.path.splitext(file_name)
+        # Nanosecond clock in hex: unique for back-to-back backups and still sorts by creation time
+        timestamp = f"{time.time_ns():x}"
+        return f"{name}_Backup_{timestamp}{ext}"
+
+    def create_backup(self, folder_path: str, file_name: str, backup_name: Optional[str] = None) -> str:
+        """Create a backup of the file with timestamp (or under the given backup_name, overwriting it)"""
+        if not self.authenticated:
+            raise Exception("Not authenticated with SharePoint")
+
+        try:
+            backup_name = backup_name or self._backup_name(file_name)
+
+            # Copy server-side, the file content never leaves SharePoint
+            source = self.ctx.web.get_file_by_server_relative_url(f"{folder_path}/{file_name}")
+            source.copyto(f"{folder_path}/{backup_name}", True)
+            self.ctx.execute_query()
+
+            logger.info(f"🛡️ Backup created: '{backup_name}'")
+            return backup_name
 
         except Exception as e:
             logger.error(f"❌ Error creating backup: {e}")
             return None
 
+    def backup_many(self, folder_path: str, file_names: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Back up several files at once: all server-side copies are sent in a single batch
+        Returns: {file_name: backup_name or None}
+        """
+        if not self.authenticated:
+            raise Exception("Not authenticated with SharePoint")
+
+        backup_names = {file_name: self._backup_name(file_name) for file_name in file_names}
+        try:
+            for file_name, backup_name in backup_names.items():
+                source = self.ctx.web.get_file_by_server_relative_url(f"{folder_path}/{file_name}")
+                source.copyto(f"{folder_path}/{backup_name}", True)
+            self.ctx.execute_batch()
+
+            logger.info(f"🛡️ Created {len(backup_names)} backups in one batch")
+            return backup_names
+
+        except Exception as e:
+            # A failed batch does not say which copy failed: keep the backups that exist
+            # and retry the others one by one under the same names (no orphan backups)
+            logger.warning(f"⚠️ Batched backup failed ({e}), retrying missing backups individually")
+            try:
+                names_filter = " or ".join(f"Name eq '{_odata_literal(name)}'" for name in backup_names.values())
+                existing_files = self._query_files(folder_path, names_filter)
+                self.ctx.execute_query()
+                existing = {file.name for file in existing_files}
+            except Exception as list_error:
+                logger.warning(f"⚠️ Could not list existing backups ({list_error}), retrying all")
+                existing = set()
+
+            return {
+                file_name: backup_name if backup_name in existing
+                else self.create_backup(folder_path, file_name, backup_name)
+                for file_name, backup_name in backup_names.items()
+            }
+
     def upload_processed_file(self, folder_path: str, file_name: str, local_path: str, create_backup: bool = True) -> Dict[str, Any]:
         """Upload processed file with optional backup creation"""
         if not self.authenticated:
@@ -331,27 +607,21 @@ class SharePointClient:
             raise Exception("Not authenticated with SharePoint")
 
         try:
-            # Download the backup file
-            temp_dir = tempfile.mkdtemp()
-            backup_temp = os.path.join(temp_dir, backup_file)
-
-            if self.download_file(folder_path, backup_file, backup_temp):
-                # Create a backup of current version before rollback
-                current_backup = self.create_backup(folder_path, original_file)
-                if current_backup:
-                    logger.info(f"🛡️ Current version backed up as: {current_backup}")
-
-                # Upload the backup as the current file (rollback)
-                if self.upload_file(folder_path, original_file, backup_temp):
-                    logger.info(f"🔄 Successfully rolled back {original_file} to {backup_file}")
-
-                    # Cleanup
-                    shutil.rmtree(temp_dir)
-                    return True
-
-            # Cleanup on failure
-            shutil.rmtree(temp_dir)
-            return False
+            original_url = f"{folder_path}/{original_file}"
+            current_backup = self._backup_name(original_file)
+            web = self.ctx.web
+
+            # Back up the current version first; a $batch is not atomic, so the overwrite
+            # is only sent once this copy has succeeded (both copies run server-side)
+            web.get_file_by_server_relative_url(original_url).copyto(f"{folder_path}/{current_backup}", True)
+            self.ctx.execute_query()
+            logger.info(f"🛡️ Current version backed up as: {current_backup}")
+
+            web.get_file_by_server_relative_url(f"{folder_path}/{backup_file}").copyto(original_url, True)
+            self.ctx.execute_query()
+
+            logger.info(f"🔄 Successfully rolled back {original_file} to {backup_file}")
+            return True
 
         except Exception as e:
             logger.error(f"❌ Error during rollback: {e}")
@@ -363,35 +633,27 @@ class SharePointClient:
             raise Exception("Not authenticated with SharePoint")
 
         try:
-            files = self.list_files(folder_path)
-
             # Extract base name without extension
             base_name = os.path.splitext(base_file_name)[0]
 
-            # Find all backup files for this base file
-            backup_files = []
-            for file in files:
-                if file['name'].startswith(f"{base_name}_Backup_"):
-                    backup_files.append({
-                        "name": file['name'],
-                        "size": file['size'],
-                        "modified": file['modified'],
-                        "type": "backup"
-                    })
-
-            # Add the original file
-            for file in files:
-                if file['name'] == base_file_name:
-                    backup_files.insert(0, {
-                        "name": file['name'],
-                        "size": file['size'],
-                        "modified": file['modified'],
-                        "type": "current"
-                    })
-                    break
+            # Let the server match backups and the original file, both queries in one batch
+            backups = self._query_files(folder_path, f"startswith(Name,'{_odata_literal(base_name)}_Backup_')")
+            current = self._query_files(folder_path, f"Name eq '{_odata_literal(base_file_name)}'")
+            self.ctx.execute_batch()
+
+            backup_files = [
+                {
+                    "name": file.name,
+                    "size": file.length,
+                    "modified": file.time_last_modified,
+                    "type": file_type
+                }
+                for files, file_type in ((current, "current"), (backups, "backup"))
+                for file in files
+            ]
 
             # Sort by modification date (newest first)
-            backup_files.sort(key=lambda x: x['modified'], reverse=True)
+            backup_files.sort(key=itemgetter('modified'), reverse=True)
 
             logger.info(f"📋 Found {len(backup_files)} versions for {base_file_name}")
             return backup_files
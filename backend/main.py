@@ -3,12 +3,17 @@ FastAPI backend for ETL Automation Tool
 """
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-import io
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import asyncio
 import logging
+import numpy as np
+import orjson
+import time
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 
 from .models import (
     FileUploadResponse, SheetPreviewRequest, SheetPreviewResponse,
@@ -20,7 +25,7 @@ from .models import (
     ProcessingPreviewRequest, ProcessingPreviewResponse, ErrorResponse
 )
 from .core.file_handler import file_manager
-from .core.cleaning import data_cleaner
+from .core.cleaning import data_cleaner, stripped_str
 from .core.preprocessing import data_processor
 from .core.master_updater import master_updater
 from .core.log_manager import log_manager, setup_log_capture
@@ -29,6 +34,39 @@ from .core.log_manager import log_manager, setup_log_capture
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows encoded per chunk when streaming CSV downloads
+CSV_CHUNK_ROWS = 50_000
+
+# Rows converted at a time when writing xlsx exports
+EXCEL_CHUNK_ROWS = 50_000
+
+# Column suggestions remembered per (input name, column list)
+SUGGESTION_CACHE_SIZE = 2048
+
+# Status values counted on their own; anything else (including empty) is OTHER
+STATUS_CATEGORIES = ("X", "D", "0")
+
+# Most distinct values listed in a column's detailed breakdown (most frequent first)
+BREAKDOWN_ROWS_LIMIT = 500
+
+# Updated items echoed back by /process-preexisting
+PREEXISTING_PREVIEW_ROWS = 10
+
+
+class DataResponse(ORJSONResponse):
+    """
+    ORJSONResponse for endpoints returning plain dicts: returned directly it skips FastAPI's
+    recursive jsonable_encoder pass, numpy scalars are encoded natively by orjson and only
+    values orjson does not know fall back to jsonable_encoder
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=jsonable_encoder,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
 # Setup log capture for export functionality
 setup_log_capture()
 
@@ -36,7 +74,9 @@ setup_log_capture()
 app = FastAPI(
     title="ETL Automation Tool API",
     description="Backend API for ETL data processing and automation",
-    version="2.0.0"
+    version="2.0.0",
+    # orjson encodes the large record previews much faster than json.dumps
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -66,11 +106,8 @@ async def upload_file(file: UploadFile = File(...)):
                 detail="Only CSV and Excel files are supported"
             )
         
-        # Read file content
-        content = await file.read()
-        
-        # Save file and get ID
-        file_id = file_manager.save_uploaded_file(content, file.filename)
+        # Stream file to disk and parse it off the event loop, then get ID
+        file_id = await asyncio.to_thread(file_manager.save_uploaded_file, file.file, file.filename)
         
         # Get sheet names
         sheet_names = file_manager.get_sheet_names(file_id)
@@ -91,9 +128,16 @@ async def upload_file(file: UploadFile = File(...)):
 
 @app.post("/preview", response_model=SheetPreviewResponse)
 async def preview_sheets(request: SheetPreviewRequest):
-    """Get preview of specified sheets"""
+    """Get a page of rows of specified sheets"""
     try:
-        previews = file_manager.preview_sheets(request.file_id, request.sheet_names)
+        # A version token from /lookup pins the page to that lookup result
+        for sheet_name in request.sheet_names:
+            file_manager.check_sheet_version(request.file_id, sheet_name, request.version)
+
+        previews = file_manager.preview_sheets(
+            request.file_id, request.sheet_names, request.limit,
+            offset=request.offset, processed=request.processed
+        )
         
         return SheetPreviewResponse(
             success=True,
@@ -111,16 +155,21 @@ async def preview_sheets(request: SheetPreviewRequest):
 async def clean_data(request: CleaningRequest):
     """Clean master and target sheets"""
     try:
-        # Get original sheets
-        master_df = file_manager.get_sheet(request.file_id, request.master_sheet)
-        target_df = file_manager.get_sheet(request.file_id, request.target_sheet)
-        
-        # Clean master sheet (YAZAKI PN only)
-        master_cleaned, master_stats = data_cleaner.clean_master_yazaki(master_df)
-        
-        # Clean target sheet
-        target_cleaned, target_stats = data_cleaner.clean_generic_sheet(target_df)
-        target_cleaned = data_cleaner.prepare_target_sheet(target_cleaned)
+        def clean_master():
+            # Clean master sheet (YAZAKI PN only)
+            master_df = file_manager.get_sheet(request.file_id, request.master_sheet)
+            return data_cleaner.clean_master_yazaki(master_df)
+
+        def clean_target():
+            # Clean target sheet
+            target_df = file_manager.get_sheet(request.file_id, request.target_sheet)
+            target_cleaned, target_stats = data_cleaner.clean_generic_sheet(target_df)
+            return data_cleaner.prepare_target_sheet(target_cleaned), target_stats
+
+        # Both sheets are cleaned concurrently in worker threads, off the event loop
+        (master_cleaned, master_stats), (target_cleaned, target_stats) = await asyncio.gather(
+            asyncio.to_thread(clean_master), asyncio.to_thread(clean_target)
+        )
         
         # Store cleaned data
         file_manager.update_sheet(request.file_id, request.master_sheet, master_cleaned)
@@ -129,8 +178,10 @@ async def clean_data(request: CleaningRequest):
         return CleaningResponse(
             success=True,
             message="Data cleaning completed successfully",
-            master_preview=master_cleaned[["YAZAKI PN"]].head(5).to_dict('records'),
-            target_preview=target_cleaned.head(5).to_dict('records'),
+            master_preview=file_manager.preview_records(
+                request.file_id, request.master_sheet, 5, processed=True, columns=("YAZAKI PN",)
+            ),
+            target_preview=file_manager.preview_records(request.file_id, request.target_sheet, 5, processed=True),
             master_shape=list(master_cleaned.shape),
             target_shape=list(target_cleaned.shape)
         )
@@ -142,13 +193,19 @@ async def clean_data(request: CleaningRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@lru_cache(maxsize=SUGGESTION_CACHE_SIZE)
+def _suggest_column_cached(input_name: str, columns: Tuple[str, ...]) -> Tuple[str, float]:
+    """Memoized data_processor.suggest_column; the UI repeats the same lookups"""
+    return data_processor.suggest_column(input_name, list(columns))
+
+
 @app.post("/suggest-column", response_model=ColumnSuggestionResponse)
 async def suggest_column(request: ColumnSuggestionRequest):
     """Suggest best matching column from available options"""
     try:
-        suggested, confidence = data_processor.suggest_column(
+        suggested, confidence = _suggest_column_cached(
             request.input_name,
-            request.available_columns
+            tuple(request.available_columns)
         )
 
         return ColumnSuggestionResponse(
@@ -185,24 +242,27 @@ async def perform_lookup(request: LookupRequest):
         master_df = file_manager.get_processed_sheet(request.file_id, request.master_sheet)
         target_df = file_manager.get_processed_sheet(request.file_id, request.target_sheet)
 
-        # Perform lookup
-        result_df, stats = data_processor.add_activation_status(
+        # Perform lookup in a worker thread so the event loop stays free
+        result_df, stats = await asyncio.to_thread(
+            data_processor.add_activation_status,
             master_df, target_df, request.key_column, request.lookup_column
         )
 
         # Store result
         file_manager.update_sheet(request.file_id, request.target_sheet, result_df)
 
-        # Generate download URL (simplified for demo)
-        download_url = f"/download/{request.file_id}/{request.target_sheet}"
+        # Version token lets the client page through the stored result without re-running the lookup
+        version = file_manager.sheet_version(request.file_id, request.target_sheet)
+        download_url = f"/download/{request.file_id}/{request.target_sheet}?version={version}"
 
         return LookupResponse(
             success=True,
             message="Lookup completed successfully",
-            result_preview=result_df.head(20).to_dict('records'),
+            result_preview=file_manager.preview_records(request.file_id, request.target_sheet, 20, processed=True),
             kpi_counts=stats["mapping_results"],
             total_records=stats["total_processed"],
-            download_url=download_url
+            download_url=download_url,
+            version=version
         )
 
     except ValueError as e:
@@ -213,19 +273,21 @@ async def perform_lookup(request: LookupRequest):
 
 
 @app.get("/download/{file_id}/{sheet_name}")
-async def download_processed_data(file_id: str, sheet_name: str):
+async def download_processed_data(file_id: str, sheet_name: str, version: Optional[int] = None):
     """Download processed data as CSV"""
     try:
+        file_manager.check_sheet_version(file_id, sheet_name, version)
         df = file_manager.get_processed_sheet(file_id, sheet_name)
 
-        # Create CSV in memory
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        output.seek(0)
+        def iter_csv():
+            """Encode the CSV in row chunks so only one chunk is held in memory"""
+            yield df.iloc[:0].to_csv(index=False).encode()
+            for start in range(0, len(df), CSV_CHUNK_ROWS):
+                yield df.iloc[start:start + CSV_CHUNK_ROWS].to_csv(index=False, header=False).encode()
 
         # Return as streaming response
         return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
+            iter_csv(),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename=processed_{sheet_name}.csv"}
         )
@@ -245,15 +307,18 @@ async def process_master_updates(request: MasterUpdateRequest):
         master_df = file_manager.get_processed_sheet(request.file_id, request.master_sheet)
         target_df = file_manager.get_processed_sheet(request.file_id, request.target_sheet)
 
-        # Process updates
-        updated_master, stats = master_updater.process_updates(
+        # Process updates in a worker thread so the event loop stays free
+        updated_master, stats = await asyncio.to_thread(
+            master_updater.process_updates,
             master_df, target_df, request.lookup_column
         )
 
         # Store updated master
         file_manager.update_sheet(request.file_id, request.master_sheet, updated_master)
-        # Also store as processed master for SharePoint upload
-        file_manager.files_storage[request.file_id]["processed_master"] = updated_master
+        # Also store as processed master for SharePoint upload (the same stored frame, not a second copy)
+        file_manager.files_storage[request.file_id]["processed_master"] = file_manager.get_processed_sheet(
+            request.file_id, request.master_sheet
+        )
 
         return MasterUpdateResponse(
             success=True,
@@ -303,57 +368,42 @@ async def download_sharepoint_file(request: SharePointDownloadRequest):
     try:
         from .core.sharepoint_client import SharePointClient
         import tempfile
-        import uuid
 
         client = SharePointClient(request.site_url, request.username, request.password)
 
         if not client.authenticate():
             raise HTTPException(status_code=401, detail="SharePoint authentication failed")
 
+        if not request.file_name.lower().endswith(('.csv', '.xls', '.xlsx')):
+            raise ValueError("Unsupported file format")
+
         # Create backup first
-        backup_name = client.create_backup(request.folder_path, request.file_name)
+        backup_name = await asyncio.to_thread(client.create_backup, request.folder_path, request.file_name)
         if backup_name:
             logger.info(f"🛡️ Backup created: {backup_name}")
 
-        # Download file to temporary location
-        temp_dir = tempfile.mkdtemp()
-        temp_file = os.path.join(temp_dir, request.file_name)
-
-        if client.download_file(request.folder_path, request.file_name, temp_file):
-            # Generate file ID and store in file manager
-            file_id = str(uuid.uuid4())
-
-            # Read file and store in file manager
-            if request.file_name.endswith('.xlsx') or request.file_name.endswith('.xls'):
-                sheets_data = pd.read_excel(temp_file, sheet_name=None)
-            elif request.file_name.endswith('.csv'):
-                df = pd.read_csv(temp_file)
-                sheets_data = {"Sheet1": df}
-            else:
-                raise ValueError("Unsupported file format")
-
-            # Store in file manager
-            file_manager.files_storage[file_id] = {
-                "filename": request.file_name,
-                "sheets": sheets_data,
-                "processed_sheets": {},
-                "source": "sharepoint"
-            }
+        # Download and parse in worker threads so the event loop stays free
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file = os.path.join(temp_dir, request.file_name)
 
-            # Cleanup temp file
-            os.remove(temp_file)
-            os.rmdir(temp_dir)
+            if not await asyncio.to_thread(
+                client.download_file, request.folder_path, request.file_name, temp_file
+            ):
+                raise Exception("Failed to download file from SharePoint")
 
-            logger.info(f"SharePoint file downloaded and processed: {request.file_name}, ID: {file_id}")
+            # Move the download into the file manager, which reads it and stores the sheets
+            file_id = await asyncio.to_thread(file_manager.save_uploaded_path, temp_file, request.file_name)
 
-            return SharePointDownloadResponse(
-                success=True,
-                message=f"File '{request.file_name}' downloaded from SharePoint successfully",
-                file_id=file_id,
-                file_name=request.file_name
-            )
-        else:
-            raise Exception("Failed to download file from SharePoint")
+        file_manager.files_storage[file_id]["source"] = "sharepoint"
+
+        logger.info(f"SharePoint file downloaded and processed: {request.file_name}, ID: {file_id}")
+
+        return SharePointDownloadResponse(
+            success=True,
+            message=f"File '{request.file_name}' downloaded from SharePoint successfully",
+            file_id=file_id,
+            file_name=request.file_name
+        )
 
     except Exception as e:
         logger.error(f"SharePoint download failed: {str(e)}")
@@ -370,8 +420,9 @@ async def preview_processing_changes(request: ProcessingPreviewRequest):
         master_df = file_manager.get_sheet(request.file_id, request.master_sheet)
         target_df = file_manager.get_sheet(request.file_id, request.target_sheet)
 
-        # Generate preview
-        preview_data = ProcessingPreview.generate_preview(
+        # Generate preview in a worker thread so the event loop stays free
+        preview_data = await asyncio.to_thread(
+            ProcessingPreview.generate_preview,
             master_df, target_df, request.lookup_column, request.key_column
         )
 
@@ -390,6 +441,41 @@ async def preview_processing_changes(request: ProcessingPreviewRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _write_excel(df: pd.DataFrame, path: str):
+    """
+    Write df as an xlsx file. xlsxwriter in constant_memory mode flushes each row to disk
+    as soon as the next one starts, so the workbook is never held in memory. pandas' to_excel
+    writes column by column, which that mode cannot take, so rows are written here directly
+    """
+    try:
+        import xlsxwriter
+    except ImportError:
+        logger.warning("xlsxwriter not installed, writing Excel with the default engine")
+        df.to_excel(path, index=False)
+        return
+
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
+    try:
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, list(df.columns), workbook.add_format({"bold": True}))
+
+        row = 1
+        for start in range(0, len(df), EXCEL_CHUNK_ROWS):
+            chunk = df.iloc[start:start + EXCEL_CHUNK_ROWS]
+            # Missing values (NaN, NA, NaT) become empty cells
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for values in chunk.itertuples(index=False, name=None):
+                worksheet.write_row(row, 0, values)
+                row += 1
+    finally:
+        workbook.close()
+
+
 @app.post("/sharepoint/upload", response_model=SharePointUploadResponse)
 async def upload_to_sharepoint(request: SharePointUploadRequest):
     """Upload processed file back to SharePoint with backup"""
@@ -408,30 +494,28 @@ async def upload_to_sharepoint(request: SharePointUploadRequest):
 
         file_data = file_manager.files_storage[request.file_id]
 
-        # Create temporary file with processed data
-        temp_dir = tempfile.mkdtemp()
-        temp_file = os.path.join(temp_dir, request.file_name)
-
-        # Save the processed data to temporary file
         if 'processed_master' in file_data:
             # Use processed master data
-            file_data['processed_master'].to_excel(temp_file, index=False)
+            export_df = file_data['processed_master']
         else:
             # Use original master data
             master_sheet = list(file_data['sheets'].keys())[0]  # Get first sheet
-            file_data['sheets'][master_sheet].to_excel(temp_file, index=False)
+            export_df = file_data['sheets'][master_sheet]
 
-        # Upload to SharePoint with backup
-        upload_result = client.upload_processed_file(
-            request.folder_path,
-            request.file_name,
-            temp_file,
-            request.create_backup
-        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_file = os.path.join(temp_dir, request.file_name)
+
+            # Write the workbook and upload it in worker threads so the event loop stays free
+            await asyncio.to_thread(_write_excel, export_df, temp_file)
 
-        # Cleanup
-        os.remove(temp_file)
-        os.rmdir(temp_dir)
+            # Upload to SharePoint with backup
+            upload_result = await asyncio.to_thread(
+                client.upload_processed_file,
+                request.folder_path,
+                request.file_name,
+                temp_file,
+                request.create_backup
+            )
 
         if upload_result["success"]:
             return SharePointUploadResponse(
@@ -506,6 +590,58 @@ async def get_file_history(file_name: str, site_url: str, username: str, passwor
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _status_breakdown(values: pd.Series) -> pd.DataFrame:
+    """
+    Count each distinct value of a status column (most frequent first) and tag it
+    with its category; the categorization runs on the distinct values only
+    """
+    value_counts = values.value_counts(dropna=False)
+    labels = value_counts.index.astype(str)
+    is_na = value_counts.index.isna()
+
+    return pd.DataFrame({
+        "Value": np.where(is_na, "Empty/NaN", labels),
+        "Count": value_counts.to_numpy(),
+        "Category": np.where(labels.isin(STATUS_CATEGORIES) & ~is_na, labels, "OTHER"),
+    })
+
+
+def _status_distribution(breakdown: pd.DataFrame) -> Dict[str, int]:
+    """Total counts per category (X, D, 0, OTHER) of a status breakdown"""
+    categories = breakdown["Category"].to_numpy()
+    counts = breakdown["Count"].to_numpy()
+    return {
+        category: int(counts[categories == category].sum())
+        for category in (*STATUS_CATEGORIES, "OTHER")
+    }
+
+
+def _compute_distribution(values: pd.Series) -> Dict[str, int]:
+    """
+    Counts per category (X, D, 0, OTHER) of a status column without building a breakdown.
+    String columns are compared directly (one kernel pass per category); other dtypes are
+    factorized (categoricals reuse their codes) and the codes counted into the four buckets
+    with one bincount. Missing values count as OTHER
+    """
+    if values.dtype != object and pd.api.types.is_string_dtype(values.dtype):
+        distribution = {category: int((values == category).sum()) for category in STATUS_CATEGORIES}
+        distribution["OTHER"] = len(values) - sum(distribution.values())
+        return distribution
+
+    other = len(STATUS_CATEGORIES)
+    codes, uniques = pd.factorize(values)
+    buckets = pd.Index(STATUS_CATEGORIES).get_indexer(pd.Index(uniques).astype(str))
+    buckets[buckets == -1] = other
+    # Trailing OTHER bucket is where the -1 code of missing values lands
+    counts = np.bincount(np.append(buckets, other)[codes], minlength=other + 1)
+    return dict(zip((*STATUS_CATEGORIES, "OTHER"), counts.tolist()))
+
+
+def _format_ts(ns: int) -> str:
+    """ISO timestamp of a time.time_ns() value; timestamps are only formatted when returned"""
+    return datetime.fromtimestamp(ns / 1e9).isoformat()
+
+
 @app.post("/analyze-column")
 async def analyze_column_distribution(request: Dict[str, Any]):
     """Analyze distribution of values in a specific column"""
@@ -514,65 +650,32 @@ async def analyze_column_distribution(request: Dict[str, Any]):
         sheet_name = request["sheet_name"]
         column_name = request["column_name"]
 
-        # Get the sheet data
-        df = file_manager.get_sheet(file_id, sheet_name)
-
-        if column_name not in df.columns:
+        if column_name not in file_manager.get_sheet_columns(file_id, sheet_name):
             raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found")
 
-        # Analyze distribution
-        value_counts = df[column_name].value_counts(dropna=False)
-
-        # Categorize values
-        distribution = {
-            "X": int(value_counts.get("X", 0)),
-            "D": int(value_counts.get("D", 0)),
-            "0": int(value_counts.get("0", 0)) + int(value_counts.get(0, 0)),  # Handle both string and numeric 0
-            "OTHER": 0
-        }
-
-        # Count other values
-        for value, count in value_counts.items():
-            if str(value) not in ["X", "D", "0"] and pd.notna(value):
-                distribution["OTHER"] += int(count)
-
-        # Add NaN/empty count to OTHER
-        nan_count = df[column_name].isna().sum()
-        distribution["OTHER"] += int(nan_count)
-
-        # Create detailed breakdown
-        detailed_breakdown = []
-        for value, count in value_counts.items():
-            category = "X" if value == "X" else "D" if value == "D" else "0" if str(value) == "0" else "OTHER"
-            detailed_breakdown.append({
-                "Value": str(value) if pd.notna(value) else "Empty/NaN",
-                "Count": int(count),
-                "Category": category,
-                "Percentage": round((count / len(df)) * 100, 2)
-            })
+        # Get the sheet data (only the analyzed column is read)
+        df = file_manager.get_sheet(file_id, sheet_name, columns=[column_name])
 
-        # Add NaN count if exists
-        if nan_count > 0:
-            detailed_breakdown.append({
-                "Value": "Empty/NaN",
-                "Count": int(nan_count),
-                "Category": "OTHER",
-                "Percentage": round((nan_count / len(df)) * 100, 2)
-            })
+        # Analyze distribution
+        breakdown = _status_breakdown(df[column_name])
+        distribution = _status_distribution(breakdown)
 
-        # Sort by count descending
-        detailed_breakdown.sort(key=lambda x: x["Count"], reverse=True)
+        # Create detailed breakdown (already sorted by count descending)
+        breakdown["Percentage"] = (breakdown["Count"] / len(df) * 100).round(2)
+        detailed_breakdown = breakdown.head(BREAKDOWN_ROWS_LIMIT).to_dict('records')
 
         logger.info(f"Column analysis completed for {column_name}: {distribution}")
 
-        return {
+        return DataResponse({
             "success": True,
             "message": f"Analysis completed for column '{column_name}'",
             "column_name": column_name,
             "total_rows": len(df),
             "distribution": distribution,
-            "detailed_breakdown": detailed_breakdown
-        }
+            "detailed_breakdown": detailed_breakdown,
+            "breakdown_total": len(breakdown),
+            "breakdown_truncated": len(breakdown) > BREAKDOWN_ROWS_LIMIT
+        })
 
     except Exception as e:
         logger.error(f"Column analysis failed: {str(e)}")
@@ -588,100 +691,62 @@ async def analyze_column_distribution_filtered(request: Dict[str, Any]):
         target_sheet = request["target_sheet"]
         column_name = request["column_name"]
 
-        # Get the sheet data
-        master_df = file_manager.get_sheet(file_id, master_sheet)
-        target_df = file_manager.get_sheet(file_id, target_sheet)
+        master_columns = file_manager.get_sheet_columns(file_id, master_sheet)
+        target_columns = file_manager.get_sheet_columns(file_id, target_sheet)
 
-        if column_name not in master_df.columns:
+        if column_name not in master_columns:
             raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found in master sheet")
 
-        if 'YAZAKI PN' not in master_df.columns:
+        if 'YAZAKI PN' not in master_columns:
             raise HTTPException(status_code=400, detail="'YAZAKI PN' column not found in master sheet")
 
-        if 'YAZAKI PN' not in target_df.columns:
+        if 'YAZAKI PN' not in target_columns:
             raise HTTPException(status_code=400, detail="'YAZAKI PN' column not found in target sheet")
 
-        # Get YAZAKI PNs from target sheet
-        target_yazaki_pns = set(target_df['YAZAKI PN'].astype(str).str.strip())
+        # Get the sheet data: only the analyzed column, PNs come from the per-sheet code cache
+        master_df = file_manager.get_sheet(file_id, master_sheet, columns=[column_name])
 
-        # Filter master data to only include items NOT in target sheet
-        master_df_copy = master_df.copy()
-        master_df_copy['YAZAKI PN'] = master_df_copy['YAZAKI PN'].astype(str).str.strip()
+        # Filter for items NOT in target sheet (PN membership cached per file);
+        # only the analyzed column is taken, the master frame is not copied
+        not_in_target = ~file_manager.pn_isin(file_id, master_sheet, target_sheet)
+        filtered_values = master_df[column_name][not_in_target]
 
-        # Filter for items NOT in target sheet
-        not_in_target = ~master_df_copy['YAZAKI PN'].isin(target_yazaki_pns)
-        filtered_df = master_df_copy[not_in_target]
+        logger.info(f"Filtered analysis: {len(master_df)} total items, {len(filtered_values)} not in target sheet")
 
-        logger.info(f"Filtered analysis: {len(master_df_copy)} total items, {len(filtered_df)} not in target sheet")
-
-        if len(filtered_df) == 0:
-            return {
+        if len(filtered_values) == 0:
+            return DataResponse({
                 "success": True,
                 "message": f"No items found in Master BOM that are not in Target sheet",
                 "column_name": column_name,
-                "total_master_rows": len(master_df_copy),
+                "total_master_rows": len(master_df),
                 "filtered_rows": 0,
                 "distribution": {"X": 0, "D": 0, "0": 0, "OTHER": 0},
                 "detailed_breakdown": []
-            }
-
-        # Analyze distribution of the filtered data
-        value_counts = filtered_df[column_name].value_counts(dropna=False)
-
-        # Categorize values
-        distribution = {
-            "X": int(value_counts.get("X", 0)),
-            "D": int(value_counts.get("D", 0)),
-            "0": int(value_counts.get("0", 0)) + int(value_counts.get(0, 0)),  # Handle both string and numeric 0
-            "OTHER": 0
-        }
-
-        # Count other values
-        for value, count in value_counts.items():
-            if str(value) not in ["X", "D", "0"] and pd.notna(value):
-                distribution["OTHER"] += int(count)
-
-        # Add NaN/empty count to OTHER
-        nan_count = filtered_df[column_name].isna().sum()
-        distribution["OTHER"] += int(nan_count)
-
-        # Create detailed breakdown
-        detailed_breakdown = []
-        for value, count in value_counts.items():
-            category = "X" if value == "X" else "D" if value == "D" else "0" if str(value) == "0" else "OTHER"
-            detailed_breakdown.append({
-                "Value": str(value) if pd.notna(value) else "Empty/NaN",
-                "Count": int(count),
-                "Category": category,
-                "Percentage": round((count / len(filtered_df)) * 100, 2),
-                "Status": "Not in Target Sheet"
             })
 
-        # Add NaN count if exists
-        if nan_count > 0:
-            detailed_breakdown.append({
-                "Value": "Empty/NaN",
-                "Count": int(nan_count),
-                "Category": "OTHER",
-                "Percentage": round((nan_count / len(filtered_df)) * 100, 2),
-                "Status": "Not in Target Sheet"
-            })
+        # Analyze distribution of the filtered data
+        breakdown = _status_breakdown(filtered_values)
+        distribution = _status_distribution(breakdown)
 
-        # Sort by count descending
-        detailed_breakdown.sort(key=lambda x: x["Count"], reverse=True)
+        # Create detailed breakdown (already sorted by count descending)
+        breakdown["Percentage"] = (breakdown["Count"] / len(filtered_values) * 100).round(2)
+        breakdown["Status"] = "Not in Target Sheet"
+        detailed_breakdown = breakdown.head(BREAKDOWN_ROWS_LIMIT).to_dict('records')
 
         logger.info(f"Filtered column analysis completed for {column_name}: {distribution}")
 
-        return {
+        return DataResponse({
             "success": True,
             "message": f"Filtered analysis completed for column '{column_name}' (items not in target sheet)",
             "column_name": column_name,
-            "total_master_rows": len(master_df_copy),
-            "filtered_rows": len(filtered_df),
+            "total_master_rows": len(master_df),
+            "filtered_rows": len(filtered_values),
             "target_sheet": target_sheet,
             "distribution": distribution,
-            "detailed_breakdown": detailed_breakdown
-        }
+            "detailed_breakdown": detailed_breakdown,
+            "breakdown_total": len(breakdown),
+            "breakdown_truncated": len(breakdown) > BREAKDOWN_ROWS_LIMIT
+        })
 
     except Exception as e:
         logger.error(f"Filtered column analysis failed: {str(e)}")
@@ -697,9 +762,8 @@ async def process_preexisting_items(request: Dict[str, Any]):
         target_sheet = request["target_sheet"]
         column_name = request["column_name"]
 
-        # Get the data
+        # Get the data (the whole master is needed to store the updated sheet)
         master_df = file_manager.get_sheet(file_id, master_sheet)
-        target_df = file_manager.get_sheet(file_id, target_sheet)
 
         if column_name not in master_df.columns:
             raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found in master sheet")
@@ -707,131 +771,116 @@ async def process_preexisting_items(request: Dict[str, Any]):
         if 'YAZAKI PN' not in master_df.columns:
             raise HTTPException(status_code=400, detail="'YAZAKI PN' column not found in master sheet")
 
-        if 'YAZAKI PN' not in target_df.columns:
+        if 'YAZAKI PN' not in file_manager.get_sheet_columns(file_id, target_sheet):
             raise HTTPException(status_code=400, detail="'YAZAKI PN' column not found in target sheet")
 
-        # Get YAZAKI PNs from target sheet
-        target_yazaki_pns = set(target_df['YAZAKI PN'].astype(str).str.strip())
+        # Factorized target YAZAKI PNs (cached per sheet)
+        target_codes = file_manager.get_pn_codes(file_id, target_sheet)
 
         # Find items in master that are:
         # 1. Not in target sheet
         # 2. Have status 'X' in the specified column
-        master_df_copy = master_df.copy()
-        master_df_copy['YAZAKI PN'] = master_df_copy['YAZAKI PN'].astype(str).str.strip()
-
-        # Create mask for items to update
-        not_in_target = ~master_df_copy['YAZAKI PN'].isin(target_yazaki_pns)
-        has_x_status = master_df_copy[column_name].astype(str).str.strip() == 'X'
+        # Masks are computed from standalone columns, the master frame itself is never copied
+        not_in_target = ~file_manager.pn_isin(file_id, master_sheet, target_sheet)
+        status = master_df[column_name]
+        has_x_status = (stripped_str(status) == 'X').to_numpy(dtype=bool, na_value=False)
         items_to_update = not_in_target & has_x_status
+        # Exact 'X' values (counted as X in distributions); padded ones like ' X' count as OTHER
+        exact_x = (status == 'X').to_numpy(dtype=bool, na_value=False)
 
         # Debug logging
-        logger.info(f"Target sheet has {len(target_yazaki_pns)} unique YAZAKI PNs")
-        logger.info(f"Master BOM has {len(master_df_copy)} total records")
+        logger.info(f"Target sheet has {len(pd.unique(target_codes))} unique YAZAKI PNs")
+        logger.info(f"Master BOM has {len(master_df)} total records")
         logger.info(f"Items not in target: {not_in_target.sum()}")
         logger.info(f"Items with 'X' status: {has_x_status.sum()}")
         logger.info(f"Items to update (not in target AND has X): {items_to_update.sum()}")
 
-        # Store original state for rollback
-        original_master_df = master_df_copy.copy()
+        # Store original state for rollback (only the values that change)
+        original_column = master_df.loc[items_to_update, [column_name]].copy()
 
         # Calculate original distribution (entire Master BOM)
-        original_value_counts = master_df_copy[column_name].value_counts(dropna=False)
-        original_distribution = {
-            "X": int(original_value_counts.get("X", 0)),
-            "D": int(original_value_counts.get("D", 0)),
-            "0": int(original_value_counts.get("0", 0)) + int(original_value_counts.get(0, 0)),
-            "OTHER": 0
-        }
-
-        # Count other values in original
-        for value, count in original_value_counts.items():
-            if str(value) not in ["X", "D", "0"] and pd.notna(value):
-                original_distribution["OTHER"] += int(count)
-
-        # Add NaN/empty count to OTHER in original
-        original_nan_count = master_df_copy[column_name].isna().sum()
-        original_distribution["OTHER"] += int(original_nan_count)
+        original_distribution = _compute_distribution(master_df[column_name])
 
         # Count items
-        total_checked = len(master_df_copy)
+        total_checked = len(master_df)
         not_in_target_count = not_in_target.sum()
         updated_count = items_to_update.sum()
 
         logger.info(f"Pre-existing processing: {updated_count} items will be updated from X to D")
         logger.info(f"Original distribution - X: {original_distribution['X']}, D: {original_distribution['D']}")
 
-        # Update the items
-        master_df_copy.loc[items_to_update, column_name] = 'D'
-
-        # Get preview of updated items
-        updated_items = master_df_copy[items_to_update].copy()
-        updated_items_preview = []
-
-        if len(updated_items) > 0:
-            # Show first 10 updated items
-            preview_items = updated_items.head(10)
-            for _, row in preview_items.iterrows():
-                updated_items_preview.append({
-                    "YAZAKI PN": row['YAZAKI PN'],
-                    "Previous Status": "X",
-                    "New Status": "D",
-                    "Reason": "Not in target sheet",
-                    f"{column_name}": row[column_name]
-                })
-
-        # Calculate new distribution
-        new_value_counts = master_df_copy[column_name].value_counts(dropna=False)
-        new_distribution = {
-            "X": int(new_value_counts.get("X", 0)),
-            "D": int(new_value_counts.get("D", 0)),
-            "0": int(new_value_counts.get("0", 0)) + int(new_value_counts.get(0, 0)),
-            "OTHER": 0
-        }
-
-        # Count other values
-        for value, count in new_value_counts.items():
-            if str(value) not in ["X", "D", "0"] and pd.notna(value):
-                new_distribution["OTHER"] += int(count)
+        # Update the items: shallow copy with the status column replaced
+        updated_master = master_df.copy(deep=False)
+        if updated_count:
+            updated_master[column_name] = master_df[column_name].mask(items_to_update, 'D')
+
+        # Get preview of updated items (first few only, the response stays small on large BOMs)
+        preview_rows = np.flatnonzero(items_to_update)[:PREEXISTING_PREVIEW_ROWS]
+        preview_pns = master_df['YAZAKI PN'].iloc[preview_rows].astype(str).str.strip()
+        preview_status = updated_master[column_name].iloc[preview_rows]
+        updated_items_preview = [
+            {
+                "YAZAKI PN": yazaki_pn,
+                "Previous Status": "X",
+                "New Status": "D",
+                "Reason": "Not in target sheet",
+                f"{column_name}": status
+            }
+            for yazaki_pn, status in zip(preview_pns, preview_status)
+        ]
 
-        # Add NaN/empty count to OTHER
-        nan_count = master_df_copy[column_name].isna().sum()
-        new_distribution["OTHER"] += int(nan_count)
+        # Calculate new distribution: only the updated rows change, and all of them become D.
+        # They all were X or padded X (OTHER), so the deltas come straight from the masks
+        moved_x = int(np.count_nonzero(exact_x & items_to_update))
+        new_distribution = dict(original_distribution)
+        new_distribution["X"] -= moved_x
+        new_distribution["OTHER"] -= int(updated_count) - moved_x
+        new_distribution["D"] += int(updated_count)
 
         # Store original state for rollback before updating
-        file_manager.files_storage[file_id]["original_master_backup"] = original_master_df.copy()
+        file_manager.files_storage[file_id]["original_master_backup"] = original_column
         file_manager.files_storage[file_id]["backup_metadata"] = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time_ns(),
             "column_name": column_name,
             "updated_count": int(updated_count),
             "original_distribution": original_distribution
         }
 
-        # Update the file manager with the modified data
-        file_manager.update_sheet(file_id, master_sheet, master_df_copy)
+        # Update the file manager with the modified data; the shallow copy is stored as-is
+        file_manager.update_sheet(file_id, master_sheet, updated_master, copy=False)
+        # Rollback reuses the distributions while the master is still at this version
+        file_manager.files_storage[file_id]["backup_metadata"].update(
+            new_distribution=new_distribution,
+            sheet_version=file_manager.sheet_version(file_id, master_sheet)
+        )
 
         logger.info(f"Pre-existing items processed: {updated_count} items updated from X to D")
         logger.info(f"New distribution - X: {new_distribution['X']}, D: {new_distribution['D']}")
         logger.info(f"Original state backed up for rollback capability")
 
-        # Verify the math
-        expected_new_x = original_distribution['X'] - updated_count
-        expected_new_d = original_distribution['D'] + updated_count
+        # Verify the math: the counter delta above is the source of truth (padded ' X' values
+        # left OTHER rather than X, so this differs from original X - updated_count only then)
+        expected_new_x = new_distribution['X']
+        expected_new_d = new_distribution['D']
         logger.info(f"Expected after update - X: {expected_new_x}, D: {expected_new_d}")
 
-        return {
+        # numpy counts are encoded by orjson as-is, no int() casts needed
+        return DataResponse({
             "success": True,
             "message": f"Successfully updated {updated_count} items from 'X' to 'D'",
-            "updated_count": int(updated_count),
-            "total_checked": int(total_checked),
-            "not_in_target_count": int(not_in_target_count),
+            "updated_count": updated_count,
+            "total_checked": total_checked,
+            "not_in_target_count": not_in_target_count,
             "column_name": column_name,
             "original_distribution": original_distribution,
             "new_distribution": new_distribution,
-            "expected_new_x": int(expected_new_x),
-            "expected_new_d": int(expected_new_d),
+            "expected_new_x": expected_new_x,
+            "expected_new_d": expected_new_d,
             "updated_items_preview": updated_items_preview,
+            "preview_total": updated_count,
+            "preview_truncated": updated_count > len(updated_items_preview),
             "rollback_available": True
-        }
+        })
 
     except Exception as e:
         logger.error(f"Pre-existing items processing failed: {str(e)}")
@@ -854,32 +903,28 @@ async def rollback_preexisting_changes(request: Dict[str, Any]):
         if "original_master_backup" not in file_data:
             raise HTTPException(status_code=404, detail="No backup available for rollback")
 
-        # Get backup data
-        original_master_df = file_data["original_master_backup"]
+        # Get backup data (a snapshot of the changed values only)
+        original_column = file_data["original_master_backup"]
         backup_metadata = file_data.get("backup_metadata", {})
-
-        # Restore original state
-        file_manager.update_sheet(file_id, master_sheet, original_master_df)
-
-        # Calculate current distribution for comparison
-        column_name = backup_metadata.get("column_name", "UNKNOWN")
-        if column_name != "UNKNOWN" and column_name in original_master_df.columns:
-            restored_value_counts = original_master_df[column_name].value_counts(dropna=False)
-            restored_distribution = {
-                "X": int(restored_value_counts.get("X", 0)),
-                "D": int(restored_value_counts.get("D", 0)),
-                "0": int(restored_value_counts.get("0", 0)) + int(restored_value_counts.get(0, 0)),
-                "OTHER": 0
-            }
-
-            # Count other values
-            for value, count in restored_value_counts.items():
-                if str(value) not in ["X", "D", "0"] and pd.notna(value):
-                    restored_distribution["OTHER"] += int(count)
-
-            # Add NaN/empty count to OTHER
-            nan_count = original_master_df[column_name].isna().sum()
-            restored_distribution["OTHER"] += int(nan_count)
+        column_name = backup_metadata.get("column_name", original_column.columns[0])
+
+        # Unchanged since the pre-existing update: restoring gives back the original distribution
+        unchanged = backup_metadata.get("sheet_version") == file_manager.sheet_version(file_id, master_sheet)
+
+        # Restore original state: put the snapshot values back into the current master's column
+        original_master_df = file_manager.get_processed_sheet(file_id, master_sheet)
+        if column_name in original_master_df.columns:
+            restored_column = original_master_df[column_name].copy()
+            rows = original_column.index.intersection(restored_column.index)
+            restored_column.loc[rows] = original_column.loc[rows, column_name]
+            file_manager.update_column(file_id, master_sheet, column_name, restored_column)
+            original_master_df = file_manager.get_processed_sheet(file_id, master_sheet)
+
+        # Calculate current distribution for comparison (recounted only if the master changed since)
+        if unchanged and "original_distribution" in backup_metadata:
+            restored_distribution = backup_metadata["original_distribution"]
+        elif column_name in original_master_df.columns:
+            restored_distribution = _compute_distribution(original_master_df[column_name])
         else:
             restored_distribution = {}
 
@@ -890,15 +935,15 @@ async def rollback_preexisting_changes(request: Dict[str, Any]):
 
         logger.info(f"Rollback completed for file {file_id}, restored {len(original_master_df)} records")
 
-        return {
+        return DataResponse({
             "success": True,
             "message": "Successfully rolled back to original state",
             "restored_records": len(original_master_df),
-            "backup_timestamp": backup_metadata.get("timestamp", "Unknown"),
+            "backup_timestamp": _format_ts(backup_metadata["timestamp"]) if "timestamp" in backup_metadata else "Unknown",
             "restored_distribution": restored_distribution,
             "column_name": column_name,
             "rollback_available": False
-        }
+        })
 
     except Exception as e:
         logger.error(f"Rollback failed: {str(e)}")
@@ -915,6 +960,8 @@ async def get_rollback_status(file_id: str):
         file_data = file_manager.files_storage[file_id]
         backup_available = "original_master_backup" in file_data
         backup_metadata = file_data.get("backup_metadata", {})
+        if "timestamp" in backup_metadata:
+            backup_metadata = {**backup_metadata, "timestamp": _format_ts(backup_metadata["timestamp"])}
 
         return {
             "success": True,
@@ -931,31 +978,22 @@ async def get_rollback_status(file_id: str):
 async def export_logs(format: str):
     """Export logs in different formats (text, json, csv)"""
     try:
-        from fastapi.responses import PlainTextResponse
-
-        if format.lower() == "text":
-            content = log_manager.export_logs_as_text()
-            return PlainTextResponse(
-                content=content,
-                headers={"Content-Disposition": f"attachment; filename=etl_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"}
-            )
-        elif format.lower() == "json":
-            content = log_manager.export_logs_as_json()
-            return PlainTextResponse(
-                content=content,
-                media_type="application/json",
-                headers={"Content-Disposition": f"attachment; filename=etl_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"}
-            )
-        elif format.lower() == "csv":
-            content = log_manager.export_logs_as_csv()
-            return PlainTextResponse(
-                content=content,
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename=etl_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
-            )
-        else:
+        exporters = {
+            "text": (log_manager.iter_logs_as_text, "text/plain", "txt"),
+            "json": (log_manager.iter_logs_as_json, "application/json", "json"),
+            "csv": (log_manager.iter_logs_as_csv, "text/csv", "csv"),
+        }
+        if format.lower() not in exporters:
             raise HTTPException(status_code=400, detail="Invalid format. Use 'text', 'json', or 'csv'")
 
+        # Exports are streamed in chunks instead of building the whole document first
+        iter_logs, media_type, extension = exporters[format.lower()]
+        return StreamingResponse(
+            iter_logs(),
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename=etl_logs_{time.strftime('%Y%m%d_%H%M%S')}.{extension}"}
+        )
+
     except Exception as e:
         logger.error(f"Log export failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -18,6 +18,10 @@ class SheetPreviewRequest(BaseModel):
     """Request model for sheet preview"""
     file_id: str
     sheet_names: List[str]
+    offset: int = Field(0, ge=0)
+    limit: int = Field(5, ge=1)
+    processed: bool = False
+    version: Optional[int] = None
 
 
 class SheetPreviewResponse(BaseModel):
@@ -60,6 +64,7 @@ class LookupResponse(BaseModel):
     kpi_counts: Dict[str, int]
     total_records: int
     download_url: str
+    version: Optional[int] = None
 
 
 class ColumnSuggestionRequest(BaseModel):
@@ -3,9 +3,23 @@ API client for communicating with FastAPI backend
 """
 import requests
 import streamlit as st
-from typing import Dict, List, Any, Optional
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Any, Callable, Optional
 import io
 
+# Keep-alive connections pooled per backend host (Streamlit reruns share the client)
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+
+# Retries for failed connects; urllib3 retries read errors only for idempotent methods, not the POSTs
+CONNECTION_RETRIES = Retry(total=2, backoff_factor=0.1)
+
+# Independent API calls issued at the same time by run_concurrently
+CONCURRENT_CALLS = 4
+
 
 class ETLAPIClient:
     """Client for ETL API communication"""
@@ -13,6 +27,27 @@ class ETLAPIClient:
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS,
+            pool_maxsize=POOL_MAXSIZE,
+            max_retries=CONNECTION_RETRIES
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=CONCURRENT_CALLS, thread_name_prefix="etl-api")
+
+    def run_concurrently(self, *calls: Callable[[], Any]) -> List[Any]:
+        """
+        Run independent API calls at the same time over the pooled session, returning
+        their results in order. Workers share the script context, so st.error still renders
+        """
+        ctx = get_script_run_ctx()
+
+        def run(call: Callable[[], Any]) -> Any:
+            add_script_run_ctx(ctx=ctx)
+            return call()
+
+        return list(self._executor.map(run, calls))
     
     def upload_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """Upload file to backend"""
@@ -253,14 +288,15 @@ class ETLAPIClient:
             st.error(f"Log export failed: {str(e)}")
             return b""
 
-    def get_log_summary(self) -> Dict[str, Any]:
-        """Get log summary"""
+    def get_log_summary(self, show_errors: bool = True) -> Dict[str, Any]:
+        """Get log summary (with show_errors=False a failure is only returned, not rendered)"""
         try:
             response = self.session.get(f"{self.base_url}/logs/summary")
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
-            st.error(f"Log summary failed: {str(e)}")
+            if show_errors:
+                st.error(f"Log summary failed: {str(e)}")
             return {"success": False, "error": str(e)}
 
     def clear_logs(self) -> Dict[str, Any]:
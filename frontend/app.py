@@ -68,8 +68,12 @@ if 'sheet_names' not in st.session_state:
 # Main header
 st.markdown('<h1 class="main-header">🔧 ETL Automation Tool v2.0</h1>', unsafe_allow_html=True)
 
-# Check API connection
-if not api_client.health_check():
+# Check API connection; the sidebar's log summary is fetched at the same time,
+# silently, so a down backend only shows the connection error below
+api_available, log_summary = api_client.run_concurrently(
+    api_client.health_check, lambda: api_client.get_log_summary(show_errors=False)
+)
+if not api_available:
     st.error("❌ Cannot connect to backend API. Please ensure the FastAPI server is running on http://localhost:8000")
     st.stop()
 
@@ -81,7 +85,7 @@ create_progress_bar(st.session_state.current_step, len(step_names), step_names)
 col_main, col_sidebar = st.columns([3, 1])
 
 with col_sidebar:
-    display_logs()
+    display_logs(log_summary)
 
     st.markdown("---")
 
@@ -6,7 +6,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import datetime
 
 
@@ -19,8 +19,8 @@ def add_log(message: str):
     st.session_state.logs.append(f"[{timestamp}] {message}")
 
 
-def display_logs():
-    """Display activity logs with export functionality"""
+def display_logs(log_summary: Optional[Dict[str, Any]] = None):
+    """Display activity logs with export functionality (log_summary is fetched when not given)"""
     from api_client import api_client
     from datetime import datetime
 
@@ -59,7 +59,11 @@ def display_logs():
         st.caption("Export detailed backend logs including LOCKUP process details")
 
         # Get log summary from backend
-        log_summary = api_client.get_log_summary()
+        if log_summary is None:
+            log_summary = api_client.get_log_summary()
+        elif log_summary.get("success") is False:
+            # A prefetched summary reports its failure here, in the sidebar
+            st.error(f"Log summary failed: {log_summary.get('error')}")
 
         if log_summary.get("session_logs_count", 0) > 0:
             # Show log statistics